@@ -1,97 +1,113 @@
 import os
-from typing import Optional
+import multiprocessing
+import time
+from typing import Iterable, Optional, Tuple
 import click
 from rich import print
 
-from .extractors import extract_text_from_file
-from .classifier import classify_text, learn
-from .organize import move_to_category
+from .cache import TextCache
+from .classifier import Classifier
+from .manifest import RunManifest, undo_run
+from .organize import IO_WORKERS, MoveResult
+from .pipeline import QUEUE_SIZE, Pipeline
+from .plan import PlanWriter, apply_plan
+from .scanner import DEFAULT_IGNORE
+from .stats import STATS, print_report, write_report
 
 
-def _detect_category_from_extension(path: str) -> Optional[str]:
-	ext = os.path.splitext(path)[1].lower()
-	if ext in {".ppt", ".pptx"}:
-		return "Präsentationen"
-	if ext in {".xlsx", ".xls", ".csv"}:
-		return "Spreadsheets"
-	if ext in {".png", ".jpg", ".jpeg", ".tif", ".tiff"}:
-		return "Fotos & Bilder"
-	if ext in {".mp3", ".wav", ".mp4", ".mkv"}:
-		return "Musik & Videos"
-	return None
+def _report_move(path: str, moved: Optional[MoveResult], error: Optional[BaseException]) -> None:
+	if error is not None:
+		print(f"[red]Failed to process {os.path.basename(path)}: {error}[/]")
+	else:
+		digest = f", blake2b {moved.digest}" if moved.digest else ""
+		print(f"[blue]Moved to:[/] {moved.path} ({moved.method}{digest})")
 
 
-def process_directory(input_dir: str, output_base: Optional[str] = None, interactive: bool = False, dry_run: bool = False) -> None:
-	"""Core processing function used by CLI and GUI.
+def process_directory(input_dir: str, output_base: Optional[str] = None, interactive: bool = False, dry_run: bool = False, classifier: Optional[Classifier] = None, workers: int = 1, use_cache: bool = True, ocr_batch: int = 32, pdf_max_pages: Optional[int] = None, io_workers: int = IO_WORKERS, checksum: bool = False, queue_size: int = QUEUE_SIZE, ignore: Iterable[str] = DEFAULT_IGNORE, max_depth: Optional[int] = None, max_size: Optional[int] = None, classify_workers: int = 1, resume: bool = False, plan_out: Optional[str] = None, stats: bool = False, stats_json: Optional[str] = None) -> None:
+	"""Core processing function used by CLI and GUI; a thin wrapper around :class:`Pipeline`.
 
 	- input_dir: folder containing unsorted files
 	- output_base: destination base folder for sorted files (created if missing)
 	- interactive: prompt for category confirmation and learn corrections
 	- dry_run: analyze only, do not move files
+	- classifier: shared classifier state (a fresh one is loaded if omitted)
+	- workers: processes used for extraction and classification. Workers classify with
+	  the rules as loaded at start of run.
+	- use_cache: reuse text extracted by earlier runs for files that have not changed
+	- ocr_batch: images handed to one Tesseract process at a time (<= 1 disables batching)
+	- pdf_max_pages: pages read from a PDF that has no keyword match yet (None = all)
+	- io_workers: moves running at the same time, overlapping with extraction
+	- checksum: verify cross-device copies with a BLAKE2 checksum, not just the size
+	- queue_size: files buffered between pipeline stages
+	- ignore: glob patterns for file/folder names left alone (lock, temp and thumbnail files)
+	- max_depth: how many folder levels below input_dir are scanned (None = all)
+	- max_size: files larger than this many bytes are left alone
+	- classify_workers: threads classifying extracted text ahead of the prompts/moves
+	- resume: continue the last interrupted run over the same folders instead of starting
+	  over (every run is recorded in the run manifest, which also allows undoing it)
+	- plan_out: with dry_run, save every decision to this JSONL plan; ``apply`` then moves
+	  the files without extracting them again
+	- stats: print per-stage latencies (p50/p95/max), counters and files/sec at the end
+	- stats_json: write the same report as JSON to this path
 	"""
 	base = output_base or os.path.join(input_dir, "organized")
 	os.makedirs(base, exist_ok=True)
 
-	for root, _, files in os.walk(input_dir):
-		# Skip the organized output itself
-		if os.path.abspath(root).startswith(os.path.abspath(base)):
-			continue
-		for name in files:
-			path = os.path.join(root, name)
-			# Extract text then classify
-			text = extract_text_from_file(path)
-			pred = classify_text(text)
-			
-			# Special handling for images - try filename analysis if OCR failed
-			if pred == "Unknown" and text.strip() == "":
-				ext = os.path.splitext(path)[1].lower()
-				if ext in {".png", ".jpg", ".jpeg", ".tif", ".tiff"}:
-					# Try to classify based on filename patterns
-					filename_lower = name.lower()
-					if any(keyword in filename_lower for keyword in ["rechnung", "invoice", "bill"]):
-						pred = "Rechnungen"
-					elif any(keyword in filename_lower for keyword in ["zertifikat", "certificate", "zeugnis", "diploma"]):
-						pred = "Zertifikate"
-					elif any(keyword in filename_lower for keyword in ["vertrag", "contract", "agreement"]):
-						pred = "Verträge"
-					elif any(keyword in filename_lower for keyword in ["versicherung", "insurance"]):
-						pred = "Versicherungen"
-					elif any(keyword in filename_lower for keyword in ["ausweis", "pass", "passport", "id"]):
-						pred = "Persönlich"
-					elif any(keyword in filename_lower for keyword in ["screenshot", "screen", "bildschirm"]):
-						pred = "Fotos & Bilder"
-					else:
-						# Default to extension-based classification for images
-						ext_hint = _detect_category_from_extension(path)
-						if ext_hint:
-							pred = ext_hint
-			elif pred == "Unknown":
-				# For non-images, use extension hints
-				ext_hint = _detect_category_from_extension(path)
-				if ext_hint:
-					pred = ext_hint
-
-			chosen = pred
-			if interactive:
-				print(f"[cyan]File:[/] {path}")
-				print(f"[yellow]Predicted:[/] {pred}")
-				resp = click.prompt("Category (Enter to accept, or type new)", default=pred, show_default=True)
-				chosen = resp.strip() or pred
-				if chosen != pred:
-					learn(text, chosen)
-			else:
-				# Auto-classify without user input
-				print(f"[cyan]File:[/] {path}")
-				print(f"[yellow]Auto-classified as:[/] {chosen}")
-
-			print(f"[green]Category:[/] {chosen}")
-			if not dry_run:
-				try:
-					moved = move_to_category(path, base, chosen)
-					print(f"[blue]Moved to:[/] {moved}")
-				except Exception as e:
-					print(f"[red]Failed to process {os.path.basename(path)}: {e}[/]")
-					continue
+	# One warm classifier per run; pick up on-disk edits once, not per file
+	classifier = classifier or Classifier()
+	classifier.refresh()
+
+	def decide(path: str, text: str, pred: str) -> str:
+		chosen = pred
+		if interactive:
+			print(f"[cyan]File:[/] {path}")
+			print(f"[yellow]Predicted:[/] {pred}")
+			resp = click.prompt("Category (Enter to accept, or type new)", default=pred, show_default=True)
+			chosen = resp.strip() or pred
+			if chosen != pred:
+				classifier.learn(text, chosen)
+		else:
+			# Auto-classify without user input
+			print(f"[cyan]File:[/] {path}")
+			print(f"[yellow]Auto-classified as:[/] {chosen}")
+
+		print(f"[green]Category:[/] {chosen}")
+		if plan:
+			plan.add(path, text, pred, chosen)
+		return chosen
+
+	cache = TextCache() if use_cache else None
+	manifest = None if dry_run else RunManifest()
+	plan = PlanWriter(plan_out, input_dir, base) if plan_out and dry_run else None
+	pipeline = Pipeline(classifier, workers=workers, cache=cache, ocr_batch=ocr_batch, pdf_max_pages=pdf_max_pages, io_workers=io_workers, checksum=checksum, queue_size=queue_size, ignore=ignore, max_depth=max_depth, max_size=max_size, manifest=manifest, classify_workers=classify_workers)
+	collect = stats or stats_json is not None
+	if collect:
+		STATS.take()
+		STATS.enabled = True
+	start = time.perf_counter()
+	try:
+		stuck = pipeline.run(input_dir, base, decide, _report_move, dry_run=dry_run, resume=resume)
+	finally:
+		if collect:
+			report = STATS.report(time.perf_counter() - start, pipeline.processed)
+			STATS.enabled = False
+			STATS.take()
+		if cache:
+			cache.close()
+		if manifest:
+			manifest.close()
+		if plan:
+			plan.close()
+			print(f"[green]Plan written to {plan.path}[/]")
+	if stuck:
+		print(f"[red]{len(stuck)} file(s) could not be moved (locked or failing):[/]")
+		for path, reason in stuck:
+			print(f"[red]  {path}:[/] {reason}")
+	if stats:
+		print_report(report)
+	if stats_json:
+		write_report(report, stats_json)
+		print(f"[green]Stats written to {stats_json}[/]")
 
 
 @click.group()
@@ -104,10 +120,72 @@ def cli() -> None:
 @click.option("--output-base", envvar="OUTPUT_BASE", default=None, help="Destination base folder for sorted files")
 @click.option("--interactive", is_flag=True, help="Ask to confirm/override category and learn from corrections")
 @click.option("--dry-run", is_flag=True, help="Analyze without moving files")
-def process(input_dir: str, output_base: Optional[str], interactive: bool, dry_run: bool) -> None:
+@click.option("--workers", type=click.IntRange(min=1), default=1, show_default=True, help="Processes used for text extraction and classification")
+@click.option("--no-cache", is_flag=True, help="Re-extract every file instead of reusing cached text")
+@click.option("--ocr-batch", type=click.IntRange(min=0), default=32, show_default=True, help="Images per Tesseract run (0 or 1 to OCR one image at a time)")
+@click.option("--pdf-max-pages", type=click.IntRange(min=1), default=None, help="Stop reading a PDF after this many pages if no keyword matched (default: all pages)")
+@click.option("--io-workers", type=click.IntRange(min=1), default=IO_WORKERS, show_default=True, help="Files moved/copied at the same time")
+@click.option("--checksum", is_flag=True, help="Hash copies across drives with BLAKE2 while copying and report the digest (no kernel copy, no read-back)")
+@click.option("--queue-size", type=click.IntRange(min=1), default=QUEUE_SIZE, show_default=True, help="Files buffered between the scan, extract, classify and move stages")
+@click.option("--ignore", "ignore_patterns", multiple=True, metavar="GLOB", help="Also skip file/folder names matching this pattern (repeatable); lock, temp and thumbnail files are always skipped")
+@click.option("--max-depth", type=click.IntRange(min=0), default=None, help="Folder levels below INPUT_DIR to scan (0 = only INPUT_DIR itself)")
+@click.option("--max-size-mb", type=click.FloatRange(min=0), default=None, help="Skip files larger than this many megabytes")
+@click.option("--classify-workers", type=click.IntRange(min=1), default=1, show_default=True, help="Threads classifying extracted text")
+@click.option("--resume", is_flag=True, help="Continue the last interrupted run over INPUT_DIR instead of starting over")
+@click.option("--plan-out", type=click.Path(dir_okay=False, writable=True), default=None, help="With --dry-run: write the decisions to this JSONL plan for 'apply'")
+@click.option("--stats", "show_stats", is_flag=True, help="Print per-stage timings (p50/p95/max), counters and files/sec at the end")
+@click.option("--stats-json", type=click.Path(dir_okay=False, writable=True), default=None, help="Write the stats report as JSON to this file")
+def process(input_dir: str, output_base: Optional[str], interactive: bool, dry_run: bool, workers: int, no_cache: bool, ocr_batch: int, pdf_max_pages: Optional[int], io_workers: int, checksum: bool, queue_size: int, ignore_patterns: Tuple[str, ...], max_depth: Optional[int], max_size_mb: Optional[float], classify_workers: int, resume: bool, plan_out: Optional[str], show_stats: bool, stats_json: Optional[str]) -> None:
 	"""Process all files in INPUT_DIR recursively and organize them."""
-	process_directory(input_dir=input_dir, output_base=output_base, interactive=interactive, dry_run=dry_run)
+	if plan_out and not dry_run:
+		raise click.UsageError("--plan-out requires --dry-run")
+	max_size = int(max_size_mb * 1024 * 1024) if max_size_mb is not None else None
+	process_directory(input_dir=input_dir, output_base=output_base, interactive=interactive, dry_run=dry_run, workers=workers, use_cache=not no_cache, ocr_batch=ocr_batch, pdf_max_pages=pdf_max_pages, io_workers=io_workers, checksum=checksum, queue_size=queue_size, ignore=DEFAULT_IGNORE + ignore_patterns, max_depth=max_depth, max_size=max_size, classify_workers=classify_workers, resume=resume, plan_out=plan_out, stats=show_stats, stats_json=stats_json)
+
+
+@cli.command()
+@click.argument("run_id", type=int, required=False)
+def undo(run_id: Optional[int]) -> None:
+	"""Move the files of a run (default: the latest) back where they came from."""
+	manifest = RunManifest()
+	try:
+		run_id = run_id or manifest.last_run()
+		if run_id is None:
+			print("[yellow]No runs recorded yet[/]")
+			return
+		restored, failed = undo_run(manifest, run_id)
+	finally:
+		manifest.close()
+	print(f"[green]Run {run_id}: {restored} file(s) restored[/]")
+	for path, reason in failed:
+		print(f"[red]  {path}:[/] {reason}")
+
+
+
+@cli.command()
+@click.argument("plan_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--output-base", envvar="OUTPUT_BASE", default=None, help="Destination base folder (default: the one the plan was made for)")
+@click.option("--io-workers", type=click.IntRange(min=1), default=IO_WORKERS, show_default=True, help="Files moved/copied at the same time")
+@click.option("--checksum", is_flag=True, help="Hash copies across drives with BLAKE2 while copying and report the digest (no kernel copy, no read-back)")
+def apply(plan_file: str, output_base: Optional[str], io_workers: int, checksum: bool) -> None:
+	"""Move files as decided in PLAN_FILE (written by process --dry-run --plan-out)."""
+	manifest = RunManifest()
+	try:
+		skipped, stuck = apply_plan(plan_file, _report_move, base=output_base, io_workers=io_workers, checksum=checksum, manifest=manifest)
+	except ValueError as e:
+		raise click.ClickException(str(e))
+	finally:
+		manifest.close()
+	if skipped:
+		print(f"[yellow]{len(skipped)} file(s) skipped:[/]")
+		for path, reason in skipped:
+			print(f"[yellow]  {path}:[/] {reason}")
+	if stuck:
+		print(f"[red]{len(stuck)} file(s) could not be moved (locked or failing):[/]")
+		for path, reason in stuck:
+			print(f"[red]  {path}:[/] {reason}")
 
 
 if __name__ == "__main__":
+	multiprocessing.freeze_support()
 	cli()
@@ -0,0 +1,106 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+from .extractors import IMAGE_EXTENSIONS, OCR_MIN_CONFIDENCE, iter_text_from_file, ocr_images_batch
+from .classifier import Classifier, IncrementalClassifier
+from .stats import STATS
+
+
+def _detect_category_from_extension(path: str) -> Optional[str]:
+	ext = os.path.splitext(path)[1].lower()
+	if ext in {".ppt", ".pptx"}:
+		return "Präsentationen"
+	if ext in {".xlsx", ".xls", ".csv"}:
+		return "Spreadsheets"
+	if ext in {".png", ".jpg", ".jpeg", ".tif", ".tiff"}:
+		return "Fotos & Bilder"
+	if ext in {".mp3", ".wav", ".mp4", ".mkv"}:
+		return "Musik & Videos"
+	return None
+
+
+def fallback_category(path: str, text: str, pred: str) -> str:
+	"""Refine an "Unknown" prediction from the file name and extension."""
+	# Special handling for images - try filename analysis if OCR failed
+	if pred == "Unknown" and text.strip() == "":
+		ext = os.path.splitext(path)[1].lower()
+		if ext in {".png", ".jpg", ".jpeg", ".tif", ".tiff"}:
+			# Try to classify based on filename patterns
+			filename_lower = os.path.basename(path).lower()
+			if any(keyword in filename_lower for keyword in ["rechnung", "invoice", "bill"]):
+				pred = "Rechnungen"
+			elif any(keyword in filename_lower for keyword in ["zertifikat", "certificate", "zeugnis", "diploma"]):
+				pred = "Zertifikate"
+			elif any(keyword in filename_lower for keyword in ["vertrag", "contract", "agreement"]):
+				pred = "Verträge"
+			elif any(keyword in filename_lower for keyword in ["versicherung", "insurance"]):
+				pred = "Versicherungen"
+			elif any(keyword in filename_lower for keyword in ["ausweis", "pass", "passport", "id"]):
+				pred = "Persönlich"
+			elif any(keyword in filename_lower for keyword in ["screenshot", "screen", "bildschirm"]):
+				pred = "Fotos & Bilder"
+			else:
+				# Default to extension-based classification for images
+				ext_hint = _detect_category_from_extension(path)
+				if ext_hint:
+					pred = ext_hint
+	elif pred == "Unknown":
+		# For non-images, use extension hints
+		ext_hint = _detect_category_from_extension(path)
+		if ext_hint:
+			pred = ext_hint
+	return pred
+
+
+# Per-process classifier for pool workers, loaded once by init_worker
+_worker_classifier: Optional[Classifier] = None
+
+
+def init_worker(stats: bool = False) -> None:
+	global _worker_classifier
+	STATS.enabled = stats
+	_worker_classifier = Classifier()
+
+
+def extract_file(path: str, classifier: Optional[Classifier] = None, pdf_max_pages: Optional[int] = None) -> Tuple[str, bool]:
+	"""Extract the text of one file, as much as classifying it needs; returns (text, complete).
+
+	Runs in pool workers as well as in-process, so it must stay a module-level function.
+	Text is streamed from the extractor, which is stopped as soon as the keyword rules
+	find a match; the category itself is decided by :func:`classify_extracted`, which
+	finds the same keyword again in the returned text. Keyword rules are not what
+	interactive learning changes, so stopping here never goes stale. ``complete`` is False
+	when the extractor was stopped early; such text must not be cached as the document's.
+	"""
+	classifier = classifier or _worker_classifier or Classifier()
+	incremental = IncrementalClassifier(classifier)
+	chunks = iter_text_from_file(path, pdf_max_pages)
+	complete = True
+	try:
+		for chunk in chunks:
+			if incremental.feed(chunk):
+				# OCR returns an image's text as one chunk, so nothing was cut off there
+				complete = is_image(path)
+				break
+	finally:
+		chunks.close()
+	return incremental.text, complete
+
+
+def classify_extracted(path: str, text: str, classifier: Classifier) -> str:
+	return fallback_category(path, text, classifier.classify(text))
+
+
+def is_image(path: str) -> bool:
+	return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def ocr_batch_texts(paths: List[str]) -> Dict[str, str]:
+	"""Batch-OCR images; returns text only for images read with enough confidence.
+
+	Anything left out goes through the regular per-image OCR strategy.
+	"""
+	return {
+		path: text for path, (text, conf) in ocr_images_batch(paths).items()
+		if text.strip() and conf >= OCR_MIN_CONFIDENCE
+	}
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .classifier import DATA_DIR
+
+CACHE_PATH = os.path.abspath(os.path.join(DATA_DIR, "text_cache.sqlite3"))
+
+# Bump whenever an extractor changes what it returns, so stale entries stop matching
+EXTRACTOR_VERSION = 5
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def file_identity(path: str) -> Tuple[str, int, int]:
+	st = os.stat(path)
+	return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+
+class TextCache:
+	"""On-disk cache of extracted text keyed by (path, size, mtime, extractor version, page cap).
+
+	``page_cap`` is the page limit the text was extracted with (None for the whole
+	document), so text from a ``--pdf-max-pages`` run is only reused by runs with the same
+	cap.
+
+	Entries are evicted least-recently-used first once the stored text exceeds ``max_bytes``;
+	hits update their recency in batches of ``touch_batch`` (and on :meth:`put`/:meth:`close`).
+	A hit means the file is unchanged since it was last extracted, so OCR/parsing is skipped.
+	"""
+
+	def __init__(self, path: str = CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES, touch_batch: int = 500) -> None:
+		self.path = path
+		self.max_bytes = max_bytes
+		self.touch_batch = touch_batch
+		# Hits whose last_used update is not written yet: identity -> time
+		self._touched: Dict[Tuple[str, int, int, int], float] = {}
+		self._lock = threading.Lock()
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+		self._db.execute("PRAGMA journal_mode=WAL")
+		self._db.execute("PRAGMA synchronous=NORMAL")
+		columns = [row[1] for row in self._db.execute("PRAGMA table_info(texts)")]
+		if columns and "page_cap" not in columns:
+			# Caches from before the page cap was part of the key; their text may be cut short
+			self._db.execute("DROP TABLE texts")
+		self._db.execute(
+			"CREATE TABLE IF NOT EXISTS texts ("
+			" path TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+			" version INTEGER NOT NULL, page_cap INTEGER NOT NULL, text TEXT NOT NULL,"
+			" nbytes INTEGER NOT NULL, last_used REAL NOT NULL,"
+			" PRIMARY KEY (path, size, mtime_ns, version, page_cap))"
+		)
+		self._db.execute("CREATE INDEX IF NOT EXISTS texts_last_used ON texts (last_used)")
+		self._db.execute("CREATE INDEX IF NOT EXISTS texts_path ON texts (path)")
+		self._db.commit()
+		self._total = self._db.execute("SELECT COALESCE(SUM(nbytes), 0) FROM texts").fetchone()[0]
+
+	def get(self, path: str, page_cap: Optional[int] = None) -> Optional[str]:
+		try:
+			key = (*file_identity(path), page_cap or 0)
+		except OSError:
+			return None
+		with self._lock:
+			row = self._db.execute(
+				"SELECT text FROM texts WHERE path=? AND size=? AND mtime_ns=? AND page_cap=? AND version=?",
+				(*key, EXTRACTOR_VERSION),
+			).fetchone()
+			if row is None:
+				return None
+			# Recency only matters for eviction, so hits are written in batches
+			self._touched[key] = time.time()
+			if len(self._touched) >= self.touch_batch:
+				self._write_touched()
+				self._db.commit()
+		return row[0]
+
+	def _write_touched(self) -> None:
+		if self._touched:
+			self._db.executemany(
+				"UPDATE texts SET last_used=? WHERE path=? AND size=? AND mtime_ns=? AND page_cap=? AND version=?",
+				[(used, *key, EXTRACTOR_VERSION) for key, used in self._touched.items()],
+			)
+			self._touched.clear()
+
+	def put(self, path: str, text: str, page_cap: Optional[int] = None) -> None:
+		try:
+			key = (*file_identity(path), page_cap or 0)
+		except OSError:
+			return
+		nbytes = len(text.encode("utf-8", errors="ignore"))
+		if nbytes > self.max_bytes:
+			return
+		with self._lock:
+			# Older identities of the same path can never hit again; text extracted from
+			# the current file with another page cap still can
+			stale_rows = "FROM texts WHERE path=? AND (size!=? OR mtime_ns!=? OR page_cap=? OR version!=?)"
+			params = (*key, EXTRACTOR_VERSION)
+			stale = self._db.execute("SELECT COALESCE(SUM(nbytes), 0) " + stale_rows, params).fetchone()[0]
+			self._write_touched()
+			self._db.execute("DELETE " + stale_rows, params)
+			self._total += nbytes - stale
+			self._db.execute(
+				"INSERT INTO texts (path, size, mtime_ns, page_cap, version, text, nbytes, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+				(*key, EXTRACTOR_VERSION, text, nbytes, time.time()),
+			)
+			self._evict()
+			self._db.commit()
+
+	def _evict(self) -> None:
+		if self._total <= self.max_bytes:
+			return
+		doomed = []
+		for rowid, nbytes in self._db.execute("SELECT rowid, nbytes FROM texts ORDER BY last_used"):
+			if self._total <= self.max_bytes:
+				break
+			doomed.append((rowid,))
+			self._total -= nbytes
+		self._db.executemany("DELETE FROM texts WHERE rowid=?", doomed)
+
+	def close(self) -> None:
+		with self._lock:
+			self._write_touched()
+			self._db.commit()
+			self._db.close()
@@ -1,8 +1,17 @@
 import json
+import math
 import os
-from typing import Dict, List, Tuple
+import re
+import threading
+from array import array
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple
 
-from rapidfuzz import fuzz
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from .learning import LearningJournal
+from .stats import STATS
 
 DEFAULT_CATEGORIES: List[str] = [
 	"Rechnungen", "Mahnungen", "Quittungen", "Angebote", "Bestellungen",
@@ -48,15 +57,16 @@ def _ensure_data_files() -> None:
 			json.dump({}, f, ensure_ascii=False, indent=2)
 
 
+_learning_journal = LearningJournal(LEARNING_PATH)
+
+
 def _load_learning() -> Dict[str, str]:
 	_ensure_data_files()
-	with open(LEARNING_PATH, "r", encoding="utf-8") as f:
-		return json.load(f)
+	return _learning_journal.load()
 
 
 def _save_learning(store: Dict[str, str]) -> None:
-	with open(LEARNING_PATH, "w", encoding="utf-8") as f:
-		json.dump(store, f, ensure_ascii=False, indent=2)
+	_learning_journal.write_snapshot(store)
 
 
 def _load_categories() -> List[str]:
@@ -96,138 +106,542 @@ def _normalize(text: str) -> str:
 	return t
 
 
-def _keyword_rules() -> List[Tuple[str, List[str]]]:
-	# Load custom keywords from file
-	custom_keywords = _load_custom_keywords()
-	
-	# Base keyword rules
-	base_rules = [
-		("Rechnungen", ["rechnung", "rechnungsnummer", "betrag", "steuer", "ust", "mwst", "fälligkeit"]),
-		("Mahnungen", ["mahnung", "zahlungserinnerung", "letzte mahnung"]),
-		("Quittungen", ["quittung", "kassenbon", "zahlung erhalten", "beleg"]),
-		("Angebote", ["angebot", "offerte", "preisangebot", "quote"]),
-		("Bestellungen", ["bestellung", "auftragsbestätigung", "order", "auftrag"]),
-		("Verträge allgemein", ["vertrag", "vertragsnummer", "vereinbarung"]),
-		("Arbeitsvertrag", ["arbeitsvertrag", "arbeitgeber", "arbeitnehmer"]),
-		("Mietvertrag", ["mietvertrag", "vermieter", "mieter", "kaution"]),
-		("Kaufvertrag", ["kaufvertrag", "käufer", "verkäufer", "kaufpreis"]),
-		("Versicherung", ["versicherung", "police", "versicherungsnummer", "beitrag"]),
-		("Steuerunterlagen", ["steuer", "elster", "einkommensteuer", "steuerbescheid"]),
-		("Kontoauszüge / Bank", ["kontoauszug", "kontobewegung", "iban", "bank"]),
-		("Bewerbungen", ["bewerbung", "anschreiben", "bewerber"]),
-		("Lebenslauf", ["lebenslauf", "cv", "curriculum vitae"]),
-		("Zeugnisse", ["zeugnis", "arbeitszeugnis", "zwischenzeugnis"]),
-		("Zertifikate", ["zertifikat", "bescheinigung", "urkunde", "certificate", "diplom", "abschluss", "qualifikation", "ausbildung", "kurs", "schulung", "teilnahme", "participation", "seminare", "workshop", "fortbildung", "weiterbildung", "lernziele", "veranstaltung"]),
-		("Schulunterlagen", ["schule", "noten", "zeugnisse", "unterricht"]),
-		("Studium / Uni", ["universität", "hochschule", "studium", "matrikel"]),
-		("Arbeitsprojekte", ["projekt", "projektplan", "task", "sprint"]),
-		("Präsentationen", ["präsentation", "folien", "agenda", "slide", "deck"]),
-		("Arztberichte", ["arzt", "befund", "diagnose"]),
-		("Rezepte", ["rezept", "verschreibung", "apotheke"]),
-		("Krankenhausunterlagen", ["krankenhaus", "entlassbrief", "stationär"]),
-		("Impfungen", ["impfung", "impfpass", "impfzertifikat"]),
-		("Krankenkasse", ["krankenkasse", "versicherungskarte", "mitgliedsnummer"]),
-		("Familie", ["familie", "heirat", "geburt"]),
-		("Kinder / Schule", ["kind", "schule", "kita"]),
-		("Haustiere", ["hund", "katze", "tierarzt"]),
-		("Tickets", ["ticket", "flug", "bahn", "eintrittskarte"]),
-		("Hotelbuchungen", ["hotel", "buchung", "reservierung"]),
-		("Urlaubsplanung", ["urlaub", "reiseplan", "itinerary"]),
-		("Ausweis / Reisepass", ["reisepass", "passnummer", "ausweis"]),
-		("Führerschein", ["führerschein", "fahrerlaubnis"]),
-		("Auto / Fahrzeugpapiere", ["fahrzeugschein", "fahrzeugbrief", "zulassung", "tüv"]),
-		("Fahrkarten / ÖPNV", ["fahrkarte", "abo", "monatskarte", "öpnv"]),
-		("Events / Konzertkarten", ["konzert", "event", "ticketmaster"]),
-		("Personalausweis", ["personalausweis", "id-karte"]),
-		("Steuerbescheide", ["steuerbescheid", "bescheid", "festsetzung"]),
-		("Gericht / Anwalt", ["gericht", "anwalt", "klage", "urteil"]),
-		("Bußgeld / Strafe", ["bußgeld", "strafe", "verwarnung"]),
-		("Rente / Sozialversicherung", ["rente", "sozialversicherung", "rentenkasse"]),
-		("Meldebescheinigung", ["meldebescheinigung", "einwohnermeldeamt"]),
-		("Zeugenaussagen / Formulare", ["formular", "zeugenaussage", "antrag"]),
-		("Handbücher / Bedienungsanleitungen", ["handbuch", "bedienungsanleitung", "manual"]),
-		("Garantie / Gewährleistung", ["garantie", "gewährleistung", "hersteller"]),
-		("Software-Lizenzen", ["lizenz", "license key", "product key"]),
-		("Screenshots / Notizen", ["screenshot", "notiz", "memo"]),
-		("Fotos & Bilder", ["foto", "bild", "jpeg", "png"]),
-		("Musik & Videos", ["musik", "audio", "video", "mp3", "mp4"]),
-		("Allgemeine Dokumente / Sonstiges", ["dokument", "unterlage", "sonstiges"]),
-	]
-	
+BASE_KEYWORD_RULES: List[Tuple[str, List[str]]] = [
+	("Rechnungen", ["rechnung", "rechnungsnummer", "betrag", "steuer", "ust", "mwst", "fälligkeit"]),
+	("Mahnungen", ["mahnung", "zahlungserinnerung", "letzte mahnung"]),
+	("Quittungen", ["quittung", "kassenbon", "zahlung erhalten", "beleg"]),
+	("Angebote", ["angebot", "offerte", "preisangebot", "quote"]),
+	("Bestellungen", ["bestellung", "auftragsbestätigung", "order", "auftrag"]),
+	("Verträge allgemein", ["vertrag", "vertragsnummer", "vereinbarung"]),
+	("Arbeitsvertrag", ["arbeitsvertrag", "arbeitgeber", "arbeitnehmer"]),
+	("Mietvertrag", ["mietvertrag", "vermieter", "mieter", "kaution"]),
+	("Kaufvertrag", ["kaufvertrag", "käufer", "verkäufer", "kaufpreis"]),
+	("Versicherung", ["versicherung", "police", "versicherungsnummer", "beitrag"]),
+	("Steuerunterlagen", ["steuer", "elster", "einkommensteuer", "steuerbescheid"]),
+	("Kontoauszüge / Bank", ["kontoauszug", "kontobewegung", "iban", "bank"]),
+	("Bewerbungen", ["bewerbung", "anschreiben", "bewerber"]),
+	("Lebenslauf", ["lebenslauf", "cv", "curriculum vitae"]),
+	("Zeugnisse", ["zeugnis", "arbeitszeugnis", "zwischenzeugnis"]),
+	("Zertifikate", ["zertifikat", "bescheinigung", "urkunde", "certificate", "diplom", "abschluss", "qualifikation", "ausbildung", "kurs", "schulung", "teilnahme", "participation", "seminare", "workshop", "fortbildung", "weiterbildung", "lernziele", "veranstaltung"]),
+	("Schulunterlagen", ["schule", "noten", "zeugnisse", "unterricht"]),
+	("Studium / Uni", ["universität", "hochschule", "studium", "matrikel"]),
+	("Arbeitsprojekte", ["projekt", "projektplan", "task", "sprint"]),
+	("Präsentationen", ["präsentation", "folien", "agenda", "slide", "deck"]),
+	("Arztberichte", ["arzt", "befund", "diagnose"]),
+	("Rezepte", ["rezept", "verschreibung", "apotheke"]),
+	("Krankenhausunterlagen", ["krankenhaus", "entlassbrief", "stationär"]),
+	("Impfungen", ["impfung", "impfpass", "impfzertifikat"]),
+	("Krankenkasse", ["krankenkasse", "versicherungskarte", "mitgliedsnummer"]),
+	("Familie", ["familie", "heirat", "geburt"]),
+	("Kinder / Schule", ["kind", "schule", "kita"]),
+	("Haustiere", ["hund", "katze", "tierarzt"]),
+	("Tickets", ["ticket", "flug", "bahn", "eintrittskarte"]),
+	("Hotelbuchungen", ["hotel", "buchung", "reservierung"]),
+	("Urlaubsplanung", ["urlaub", "reiseplan", "itinerary"]),
+	("Ausweis / Reisepass", ["reisepass", "passnummer", "ausweis"]),
+	("Führerschein", ["führerschein", "fahrerlaubnis"]),
+	("Auto / Fahrzeugpapiere", ["fahrzeugschein", "fahrzeugbrief", "zulassung", "tüv"]),
+	("Fahrkarten / ÖPNV", ["fahrkarte", "abo", "monatskarte", "öpnv"]),
+	("Events / Konzertkarten", ["konzert", "event", "ticketmaster"]),
+	("Personalausweis", ["personalausweis", "id-karte"]),
+	("Steuerbescheide", ["steuerbescheid", "bescheid", "festsetzung"]),
+	("Gericht / Anwalt", ["gericht", "anwalt", "klage", "urteil"]),
+	("Bußgeld / Strafe", ["bußgeld", "strafe", "verwarnung"]),
+	("Rente / Sozialversicherung", ["rente", "sozialversicherung", "rentenkasse"]),
+	("Meldebescheinigung", ["meldebescheinigung", "einwohnermeldeamt"]),
+	("Zeugenaussagen / Formulare", ["formular", "zeugenaussage", "antrag"]),
+	("Handbücher / Bedienungsanleitungen", ["handbuch", "bedienungsanleitung", "manual"]),
+	("Garantie / Gewährleistung", ["garantie", "gewährleistung", "hersteller"]),
+	("Software-Lizenzen", ["lizenz", "license key", "product key"]),
+	("Screenshots / Notizen", ["screenshot", "notiz", "memo"]),
+	("Fotos & Bilder", ["foto", "bild", "jpeg", "png"]),
+	("Musik & Videos", ["musik", "audio", "video", "mp3", "mp4"]),
+	("Allgemeine Dokumente / Sonstiges", ["dokument", "unterlage", "sonstiges"]),
+]
+
+
+def _keyword_rules(custom_keywords: Dict[str, List[str]]) -> List[Tuple[str, List[str]]]:
 	# Add custom keywords to the rules (at the beginning for priority)
 	custom_rules = []
 	for category, keywords in custom_keywords.items():
 		custom_rules.append((category, keywords))
 	
 	# Return custom rules first, then base rules
-	return custom_rules + base_rules
+	return custom_rules + BASE_KEYWORD_RULES
 
 
-def classify_text(text: str) -> str:
-	text_norm = _normalize(text)
-	if not text_norm.strip():
-		return "Unknown"
+def _trie_pattern(node: Dict[str, dict]) -> str:
+	# Render a keyword trie as a regex. Children start with distinct characters, so at most
+	# one branch can match; the optional group is greedy, so the longest keyword wins.
+	terminal = "" in node
+	branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+	if not branches:
+		return ""
+	body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+	if terminal:
+		return "(?:" + body + ")?"
+	return body
 
-	# Rule-based keywords - prioritize longer, more specific matches
-	rules = _keyword_rules()
-	
-	# Sort rules by keyword length (longer keywords first) for better specificity
-	sorted_rules = []
-	for category, keywords in rules:
-		for kw in keywords:
-			sorted_rules.append((len(kw), category, kw))
-	
-	# Sort by length descending, then by category name
-	sorted_rules.sort(key=lambda x: (-x[0], x[1]))
-	
-	for _, category, kw in sorted_rules:
-		if kw in text_norm:
+
+class KeywordMatcher:
+	"""All keyword rules compiled into a single trie-shaped regex.
+
+	One scan over the text finds the longest keyword starting at every position; the
+	winner is the longest keyword overall, ties broken by category name, exactly as the
+	old per-keyword loop over ``sorted_rules`` did.
+	"""
+
+	def __init__(self, rules: List[Tuple[str, List[str]]]) -> None:
+		# (length, category, keyword), sorted longest first, then by category name
+		self.sorted_rules: List[Tuple[int, str, str]] = sorted(
+			{(len(kw), category, kw) for category, keywords in rules for kw in keywords if kw},
+			key=lambda x: (-x[0], x[1]),
+		)
+		# A keyword listed under several categories belongs to the first one in sort order
+		self._owner: Dict[str, str] = {}
+		trie: Dict[str, dict] = {}
+		for _, category, kw in self.sorted_rules:
+			if kw in self._owner:
+				continue
+			self._owner[kw] = category
+			node = trie
+			for ch in kw:
+				node = node.setdefault(ch, {})
+			node[""] = {}
+		self.max_len = self.sorted_rules[0][0] if self.sorted_rules else 0
+		self._pattern = re.compile("(?=(" + _trie_pattern(trie) + "))") if trie else None
+		# Distinct keywords in sort order, grouped by length for the fuzzy stage
+		self._fuzzy_groups: Dict[int, List[str]] = {}
+		for kw in self._owner:
+			self._fuzzy_groups.setdefault(len(kw), []).append(kw)
+
+	def match(self, text_norm: str) -> Optional[str]:
+		if self._pattern is None:
+			return None
+		best: Optional[Tuple[int, str]] = None
+		for m in self._pattern.finditer(text_norm):
+			kw = m.group(1)
+			key = (-len(kw), self._owner[kw])
+			if best is None or key < best:
+				best = key
+				if len(kw) == self.max_len and key[1] == self.sorted_rules[0][1]:
+					break
+		return best[1] if best else None
+
+	def fuzzy_match(self, text_norm: str, cutoff: float = 80) -> Optional[str]:
+		"""Best fuzz.ratio match of any keyword against any word scoring above ``cutoff``.
+
+		Ties go to the keyword that comes first in sort order, like the old scalar loop.
+		"""
+		tokens_by_len: Dict[int, List[str]] = {}
+		for token in set(text_norm.split()):
+			tokens_by_len.setdefault(len(token), []).append(token)
+		if not tokens_by_len:
+			return None
+
+		best_by_kw: Dict[str, float] = {}
+		for length, keywords in self._fuzzy_groups.items():
+			# ratio <= 200 * min(a, b) / (a + b), so only words between 2/3 and 3/2 of the
+			# keyword length can clear an 80 cutoff
+			lo, hi = (2 * length) // 3, -(-3 * length // 2)
+			candidates = [t for n in range(lo, hi + 1) for t in tokens_by_len.get(n, ())]
+			if not candidates:
+				continue
+			scores = process.cdist(
+				keywords, candidates, scorer=fuzz.ratio, score_cutoff=cutoff,
+				dtype=np.float64, workers=-1,
+			)
+			for kw, score in zip(keywords, scores.max(axis=1)):
+				if score > cutoff:
+					best_by_kw[kw] = float(score)
+
+		best_kw = None
+		best_score = 0.0
+		for kw in self._owner:
+			score = best_by_kw.get(kw, 0.0)
+			if score > best_score:
+				best_kw, best_score = kw, score
+		return self._owner[best_kw] if best_kw else None
+
+
+class ExemplarIndex:
+	"""Character n-gram index over learned exemplars, so only a few are scored exactly.
+
+	``fuzz.partial_ratio`` aligns an exemplar with a stretch of the text no longer than the
+	exemplar, so the text is cut into windows twice as long as the longest exemplar,
+	overlapping by half: every such stretch lies inside one of them. Comparing against the
+	whole text instead would rate everything alike once the text is long, as it then holds
+	most n-grams of every exemplar. Each exemplar is rated by its best window: the weight
+	of the n-grams they share over that of the smaller side, weighing each n-gram by its
+	rarity among the exemplars (IDF). The ``MAX_CANDIDATES`` highest rated exemplars (at
+	least ``MIN_OVERLAP``, with any tied with the last one) are then scored exactly against
+	that window.
+	"""
+
+	# Shorter n-grams turn up everywhere in real text; longer ones rarely survive OCR errors
+	GRAM = 5
+	# n-grams in more exemplars than this weigh nothing and are never looked up, which
+	# bounds the work per text position
+	MAX_DF = 256
+	MIN_OVERLAP = 0.1
+	MAX_CANDIDATES = 8
+	# Exemplar weights follow the IDFs once the store has grown by this factor
+	REWEIGHT_GROWTH = 1.05
+	# Window x exemplar ratings computed at a time, bounding memory on long texts
+	BLOCK_CELLS = 1 << 20
+
+	def __init__(self, learning: Dict[str, str]) -> None:
+		self._ids: Dict[str, int] = {}
+		self._norm: List[str] = []
+		self._categories: List[str] = []
+		self._max_len = 0
+		self._vocab: Dict[str, int] = {}
+		# Per n-gram id: the exemplars containing it; their count is its document frequency
+		self._postings: List[array] = []
+		self._df = array("i")
+		# The postings packed into one array, rebuilt on the first lookup after a change
+		self._packed: Optional[Tuple[np.ndarray, np.ndarray]] = None
+		# Per exemplar: its n-gram ids, and the IDF weight of all of them
+		self._grams: List[array] = []
+		self._weights = np.zeros(0)
+		self._weighted_count = 0
+		# Exemplars too short for an n-gram, always scored
+		self._tiny: List[int] = []
+		for exemplar, category in learning.items():
+			self.add(exemplar, category)
+
+	def __len__(self) -> int:
+		return len(self._norm)
+
+	def add(self, exemplar: str, category: str) -> None:
+		if exemplar in self._ids:
+			self._categories[self._ids[exemplar]] = category
+			return
+		idx = len(self._norm)
+		norm = _normalize(exemplar)
+		gids = array("i")
+		for gram in {norm[i:i + self.GRAM] for i in range(len(norm) - self.GRAM + 1)}:
+			gid = self._vocab.get(gram)
+			if gid is None:
+				gid = self._vocab[gram] = len(self._postings)
+				self._postings.append(array("i"))
+				self._df.append(0)
+			self._postings[gid].append(idx)
+			self._df[gid] += 1
+			gids.append(gid)
+		self._ids[exemplar] = idx
+		self._norm.append(norm)
+		self._categories.append(category)
+		self._grams.append(gids)
+		self._max_len = max(self._max_len, len(norm))
+		self._packed = None
+		if not gids:
+			self._tiny.append(idx)
+
+	def _idf(self, df: np.ndarray) -> np.ndarray:
+		return np.where(df <= self.MAX_DF, np.log1p(len(self._norm) / (1.0 + df)), 0.0)
+
+	def _exemplar_weights(self, idf: np.ndarray) -> np.ndarray:
+		count = len(self._norm)
+		if count > self._weighted_count * self.REWEIGHT_GROWTH:
+			first = 0
+			self._weighted_count = count
+		elif len(self._weights) < count:
+			# Few exemplars learned since: weigh just those with today's IDFs
+			first = len(self._weights)
+		else:
+			return self._weights
+		added = [idf[np.frombuffer(gids, dtype=np.intc)].sum() if gids else 0.0 for gids in self._grams[first:]]
+		self._weights = np.concatenate([self._weights[:first], added])
+		return self._weights
+
+	def _pack(self) -> Tuple[np.ndarray, np.ndarray]:
+		if self._packed is None:
+			df = np.frombuffer(self._df, dtype=np.intc)
+			starts = np.zeros(len(df), dtype=np.intp)
+			np.cumsum(df[:-1], out=starts[1:])
+			flat = np.concatenate([np.frombuffer(p, dtype=np.intc) for p in self._postings]) if self._postings else np.zeros(0, dtype=np.intc)
+			self._packed = (flat, starts)
+		return self._packed
+
+	def _text_grams(self, text_norm: str) -> np.ndarray:
+		# n-gram id at each position; n-grams no exemplar has get ids past the known ones
+		grams = [text_norm[i:i + self.GRAM] for i in range(len(text_norm) - self.GRAM + 1)]
+		ids = np.fromiter(map(self._vocab.get, grams, repeat(-1)), dtype=np.intp, count=len(grams))
+		missing = np.flatnonzero(ids < 0)
+		if len(missing):
+			known = len(self._postings)
+			unknown: Dict[str, int] = {}
+			ids[missing] = [unknown.setdefault(grams[i], known + len(unknown)) for i in missing.tolist()]
+		return ids
+
+	def candidates(self, text_norm: str) -> List[Tuple[int, str]]:
+		"""Exemplars worth scoring exactly, highest rated first, each with its best window."""
+		count = len(self._norm)
+		positions = self._text_grams(text_norm)
+		tiny = [(idx, text_norm) for idx in self._tiny]
+		if not count or not len(positions):
+			return tiny
+		known = len(self._postings)
+		flat, starts = self._pack()
+		df = np.frombuffer(self._df, dtype=np.intc)
+		idf = self._idf(df)
+		# Zero weights only come with zero shared weight; make those ratings 0, not NaN
+		weights = self._exemplar_weights(idf)
+		weights = np.where(weights > 0, weights, np.inf)
+
+		# Block b of the text belongs to windows b - 1 and b
+		stride = max(self._max_len, self.GRAM)
+		block = np.arange(len(positions)) // stride
+		windows = max(1, int(block[-1]))
+		vocab_size = int(positions.max()) + 1
+		keys = np.sort(np.concatenate([
+			np.minimum(block, windows - 1) * vocab_size + positions,
+			np.maximum(block - 1, 0) * vocab_size + positions,
+		]))
+		keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+		window, gid = np.divmod(keys, vocab_size)
+		# n-grams no exemplar has weigh as much as one only a single exemplar has
+		gram_idf = np.append(idf, math.log1p(count / 2.0))[np.minimum(gid, known)]
+		window_weight = np.bincount(window, weights=gram_idf, minlength=windows)
+		window_weight[window_weight == 0] = np.inf
+
+		# Every (window, exemplar) pair sharing an n-gram, in window order
+		shared = (gid < known) & (gram_idf > 0)
+		if not shared.any():
+			return tiny
+		window, gid, gram_idf = window[shared], gid[shared], gram_idf[shared]
+		lengths = df[gid]
+		firsts = np.repeat(starts[gid] - (np.cumsum(lengths) - lengths), lengths)
+		owners = flat[np.arange(len(firsts)) + firsts]
+		window = np.repeat(window, lengths)
+		gram_idf = np.repeat(gram_idf, lengths)
+
+		best = np.zeros(count)
+		best_window = np.zeros(count, dtype=np.intp)
+		columns = np.arange(count)
+		step = max(1, self.BLOCK_CELLS // count)
+		for first in range(0, windows, step):
+			last = min(first + step, windows)
+			lo, hi = np.searchsorted(window, [first, last])
+			cells = np.bincount((window[lo:hi] - first) * count + owners[lo:hi], weights=gram_idf[lo:hi], minlength=(last - first) * count)
+			cells = cells.reshape(last - first, count)
+			cells /= np.minimum(weights, window_weight[first:last, None])
+			rows = cells.argmax(axis=0)
+			rated = cells[rows, columns]
+			better = rated > best
+			best[better] = rated[better]
+			best_window[better] = rows[better] + first
+
+		hits = np.flatnonzero(best >= self.MIN_OVERLAP)
+		# Highest rated first; exemplars rated alike stay in store order, and all of them are kept
+		ranked = hits[np.lexsort((hits, -best[hits]))]
+		if len(ranked) > self.MAX_CANDIDATES:
+			ranked = ranked[best[ranked] >= best[ranked[self.MAX_CANDIDATES - 1]]]
+		found = []
+		for idx, k in zip(ranked.tolist(), best_window[ranked].tolist()):
+			# The last window runs to the end of the text
+			end = (k + 2) * stride + self.GRAM - 1 if k < windows - 1 else len(text_norm)
+			found.append((idx, text_norm[k * stride:end]))
+		return found + tiny
+
+	def best_match(self, text_norm: str, threshold: float = 70) -> Optional[str]:
+		if len(text_norm) < self.GRAM:
+			found = process.extractOne(text_norm, self._norm, scorer=fuzz.partial_ratio, score_cutoff=threshold)
+			return self._categories[found[2]] if found else None
+
+		best_idx = -1
+		best_score = 0.0
+		for idx, window in self.candidates(text_norm):
+			# Past a perfect score only an exemplar learned earlier can still win
+			if best_score == 100 and idx > best_idx:
+				continue
+			# Scores below the cutoff come back as 0; only a tie or better can matter
+			score = fuzz.partial_ratio(self._norm[idx], window, score_cutoff=max(threshold, best_score))
+			# Equal scores go to the exemplar learned first, as with a full scan
+			if score > best_score or (score == best_score and idx < best_idx):
+				best_idx, best_score = idx, score
+		return self._categories[best_idx] if best_idx >= 0 and best_score >= threshold else None
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+	try:
+		st = os.stat(path)
+	except OSError:
+		return None
+	return (st.st_mtime_ns, st.st_size)
+
+
+class Classifier:
+	"""Warm classifier state shared across a run.
+
+	``categories.json``, ``custom_keywords.json`` and ``learning.json`` are loaded once and
+	the keyword rules stay compiled in memory. :meth:`refresh` reloads only files whose
+	mtime/size changed; :meth:`classify` itself never touches the filesystem. Writes made
+	through :meth:`learn` and :meth:`add_custom_keywords` update the in-memory state directly.
+	Classifying and learning may happen on different threads; ``generation`` changes
+	whenever something :meth:`classify` depends on does, so callers holding a prediction
+	can tell it may be stale.
+	"""
+
+	def __init__(self) -> None:
+		self.categories: List[str] = []
+		self.custom_keywords: Dict[str, List[str]] = {}
+		self.learning: Dict[str, str] = {}
+		self.exemplars = ExemplarIndex({})
+		self.matcher = KeywordMatcher(_keyword_rules({}))
+		self._stamps: Dict[str, Optional[Tuple[int, int]]] = {}
+		self.generation = 0
+		# Guards the learned exemplars, which learn() mutates
+		self._lock = threading.RLock()
+		self.refresh()
+
+	def _changed(self, path: str, required: bool = True) -> bool:
+		stamp = _file_stamp(path)
+		if stamp is None and required:
+			_ensure_data_files()
+			stamp = _file_stamp(path)
+		if path in self._stamps and self._stamps[path] == stamp:
+			return False
+		self._stamps[path] = stamp
+		return True
+
+	def refresh(self) -> None:
+		"""Reload any data file that changed on disk since it was last read."""
+		if self._changed(CATEGORIES_PATH):
+			self.categories = _load_categories()
+		if self._changed(CUSTOM_KEYWORDS_PATH):
+			self.custom_keywords = _load_custom_keywords()
+			self.matcher = KeywordMatcher(_keyword_rules(self.custom_keywords))
+			self.generation += 1
+		# Evaluate both so each stamp is recorded
+		snapshot_changed = self._changed(LEARNING_PATH)
+		journal_changed = self._changed(_learning_journal.journal_path, required=False)
+		if snapshot_changed or journal_changed:
+			learning = _load_learning()
+			exemplars = ExemplarIndex(learning)
+			with self._lock:
+				self.learning, self.exemplars = learning, exemplars
+				self.generation += 1
+
+	def classify(self, text: str) -> str:
+		text_norm = _normalize(text)
+		if not text_norm.strip():
+			return "Unknown"
+
+		# Rule-based keywords - longest keyword wins, then category name
+		with STATS.timer("classify.keyword"):
+			category = self.matcher.match(text_norm)
+		if category:
+			STATS.count("classify.by.keyword")
 			return category
-	
-	# Try fuzzy matching for OCR errors
-	from rapidfuzz import fuzz
-	best_fuzzy_match = None
-	best_fuzzy_score = 0
-	
-	for _, category, kw in sorted_rules:
-		# Check if keyword is similar to any word in the text
-		words = text_norm.split()
-		for word in words:
-			score = fuzz.ratio(kw, word)
-			if score > 80 and score > best_fuzzy_score:  # 80% similarity threshold
-				best_fuzzy_match = category
-				best_fuzzy_score = score
-	
-	if best_fuzzy_match:
-		return best_fuzzy_match
+		
+		# Try fuzzy matching for OCR errors
+		with STATS.timer("classify.fuzzy"):
+			best_fuzzy_match = self.matcher.fuzzy_match(text_norm)
+		if best_fuzzy_match:
+			STATS.count("classify.by.fuzzy")
+			return best_fuzzy_match
+
+		# Fuzzy match against learned exemplars (threshold avoids random matches)
+		with STATS.timer("classify.learned"), self._lock:
+			category = self.exemplars.best_match(text_norm)
+		STATS.count("classify.by.learned" if category else "classify.by.none")
+		return category or "Unknown"
+
+	def learn(self, text: str, category: str) -> None:
+		if not text.strip():
+			return
+		snippet = _normalize(text).strip()[:500]
+		with self._lock:
+			self.learning[snippet] = category
+			self.exemplars.add(snippet, category)
+			self.generation += 1
+			_learning_journal.append(snippet, category)
+			self._stamps[_learning_journal.journal_path] = _file_stamp(_learning_journal.journal_path)
+			_learning_journal.maybe_compact(self.learning)
+
+	def add_custom_keywords(self, category: str, keywords: List[str]) -> None:
+		self.custom_keywords[category] = keywords
+		_save_custom_keywords(self.custom_keywords)
+		self._stamps[CUSTOM_KEYWORDS_PATH] = _file_stamp(CUSTOM_KEYWORDS_PATH)
+		self.matcher = KeywordMatcher(_keyword_rules(self.custom_keywords))
+		self.generation += 1
+
+
+class IncrementalClassifier:
+	"""Classifies a document from streamed text chunks.
+
+	Every chunk (a PDF page, a paragraph, a block of a text file) goes through the keyword
+	matcher as it arrives, together with the end of the previous chunk so keywords
+	spanning a boundary are found. :meth:`feed` returns True once a chunk has a keyword
+	match; the caller can then stop the extractor, e.g. right after the deciding page of
+	a PDF. At most ``max_chars`` of text are kept for the fuzzy and learned stages, which
+	bounds memory for huge documents.
+	"""
+
+	def __init__(self, classifier: Classifier, max_chars: int = 2_000_000) -> None:
+		self.classifier = classifier
+		self.max_chars = max_chars
+		self.category: Optional[str] = None
+		self._kept: List[str] = []
+		self._kept_chars = 0
+		self._tail = ""
 
-	# Fuzzy match against learned exemplars
-	learning = _load_learning()
-	best_category = "Unknown"
-	best_score = 0
-	for exemplar, category in learning.items():
-		score = fuzz.partial_ratio(_normalize(exemplar), text_norm)
-		if score > best_score:
-			best_score = score
-			best_category = category
+	@property
+	def text(self) -> str:
+		"""Text seen so far (up to ``max_chars``)."""
+		return "".join(self._kept)
 
-	# Threshold to avoid random matches
-	if best_score >= 70:
-		return best_category
-	return "Unknown"
+	def feed(self, chunk: str) -> bool:
+		if self.category is not None:
+			return True
+		if not chunk:
+			return False
+		room = self.max_chars - self._kept_chars
+		if room > 0:
+			self._kept.append(chunk[:room])
+			self._kept_chars += min(room, len(chunk))
+		# _normalize works per character, so normalized chunks join up like the whole text
+		norm = _normalize(chunk)
+		matcher = self.classifier.matcher
+		self.category = matcher.match(self._tail + norm)
+		self._tail = (self._tail + norm)[-(matcher.max_len - 1):] if matcher.max_len > 1 else ""
+		return self.category is not None
+
+	def finish(self) -> str:
+		"""Category for everything fed so far."""
+		if self.category is not None:
+			return self.category
+		return self.classifier.classify(self.text)
+
+
+_default_classifier: Optional[Classifier] = None
+
+
+def get_classifier() -> Classifier:
+	"""Process-wide shared :class:`Classifier`, created on first use."""
+	global _default_classifier
+	if _default_classifier is None:
+		_default_classifier = Classifier()
+	return _default_classifier
+
+
+def classify_text(text: str) -> str:
+	# Standalone callers still see on-disk edits; refresh() is a few stat calls
+	classifier = get_classifier()
+	classifier.refresh()
+	return classifier.classify(text)
 
 
 def learn(text: str, category: str) -> None:
-	if not text.strip():
-		return
-	store = _load_learning()
-	snippet = _normalize(text).strip()[:500]
-	store[snippet] = category
-	_save_learning(store)
+	classifier = get_classifier()
+	classifier.refresh()
+	classifier.learn(text, category)
 
 
 def add_custom_keywords(category: str, keywords: List[str]) -> None:
 	"""Add custom keywords for a category"""
-	custom_keywords = _load_custom_keywords()
-	custom_keywords[category] = keywords
-	_save_custom_keywords(custom_keywords)
+	classifier = get_classifier()
+	classifier.refresh()
+	classifier.add_custom_keywords(category, keywords)
@@ -1,14 +1,29 @@
+import codecs
+import csv
+import io
 import os
-from typing import Optional
+import subprocess
+import tempfile
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain, islice
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
 
 from PIL import Image
 import pytesseract
-from pdfminer.high_level import extract_text as pdf_extract_text
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
 from pypdf import PdfReader
 from docx import Document
 from pptx import Presentation
 from openpyxl import load_workbook
-import chardet
+from chardet.universaldetector import UniversalDetector
+
+from .imageprep import open_image, prepare_image
+from .ooxml import iter_docx_paragraphs, iter_pptx_shape_texts, iter_xlsx_rows
+from .stats import STATS
 
 
 def _ensure_tesseract_path() -> None:
@@ -38,40 +53,159 @@ def _ensure_tesseract_path() -> None:
 	# pytesseract will use the default 'tesseract' command
 
 
+OCR_CONFIGS: List[Tuple[str, str]] = [
+	('deu+eng', '--psm 6'),  # Uniform block of text
+	('eng+deu', '--psm 6'),
+	('deu+eng', '--psm 3'),  # Fully automatic page segmentation
+	('eng+deu', '--psm 3'),
+	('eng', '--psm 6'),
+	('deu', '--psm 6'),
+]
+
+# Mean word confidence (0-100) at which an OCR pass is accepted without trying other configs
+OCR_MIN_CONFIDENCE = 60.0
+
+
+def _words_to_text(data: Dict[str, list]) -> Tuple[str, float]:
+	# image_to_data/TSV rows -> line-joined text and mean confidence of recognised words
+	lines: Dict[Tuple[int, int, int], List[str]] = {}
+	confidences: List[float] = []
+	for i, word in enumerate(data["text"]):
+		if not word or not word.strip():
+			continue
+		key = (int(data["block_num"][i]), int(data["par_num"][i]), int(data["line_num"][i]))
+		lines.setdefault(key, []).append(word)
+		conf = float(data["conf"][i])
+		if conf >= 0:
+			confidences.append(conf)
+	text = "\n".join(" ".join(words) for words in lines.values())
+	confidence = sum(confidences) / len(confidences) if confidences else 0.0
+	return text, confidence
+
+
+def _ocr_stage(lang: str, psm: str) -> str:
+	# Stats name of a config, e.g. "ocr.deu+eng.psm6"
+	return f"ocr.{lang}.{psm.lstrip('-').replace(' ', '')}"
+
+
+def _ocr_with_confidence(img: Image.Image, lang: str, psm: str) -> Tuple[str, float]:
+	with STATS.timer(_ocr_stage(lang, psm)):
+		data = pytesseract.image_to_data(img, lang=lang, config=psm, output_type=pytesseract.Output.DICT)
+	return _words_to_text(data)
+
+
+class OcrStrategy:
+	"""Picks Tesseract configs per image from how well they did on earlier images.
+
+	Each pass uses ``image_to_data`` so the mean word confidence is known. A pass at or
+	above ``min_confidence`` is accepted straight away; otherwise the next config is tried
+	and the most confident text wins. Configs that won before are tried first, so a batch
+	of similar scans settles on a single Tesseract launch per image.
+	"""
+
+	def __init__(self, configs: List[Tuple[str, str]], min_confidence: float = OCR_MIN_CONFIDENCE) -> None:
+		self.configs = list(configs)
+		self.min_confidence = min_confidence
+		self.wins: Counter = Counter()
+
+	def ordered(self) -> List[Tuple[str, str]]:
+		# sorted() is stable, so untried configs keep their declared order
+		return sorted(self.configs, key=lambda cfg: -self.wins[cfg])
+
+	def run(self, img: Image.Image, path: str) -> str:
+		best_text = ""
+		best_conf = -1.0
+		best_cfg: Optional[Tuple[str, str]] = None
+		for lang, psm in self.ordered():
+			try:
+				text, conf = _ocr_with_confidence(img, lang, psm)
+			except Exception as e:
+				print(f"[yellow]OCR failed for {path} with language {lang}, config {psm}: {e}[/]")
+				continue
+			if text.strip() and conf > best_conf:
+				best_text, best_conf, best_cfg = text, conf, (lang, psm)
+			if best_conf >= self.min_confidence:
+				break
+		if best_cfg:
+			self.wins[best_cfg] += 1
+			lang, psm = best_cfg
+			STATS.count(_ocr_stage(lang, psm) + ".accepted")
+			print(f"[green]OCR successful for {path} with language: {lang}, config: {psm} (confidence {best_conf:.0f})[/]")
+		return best_text
+
+
+# One strategy per process, so a run (or pool worker) learns which config suits its scans
+_ocr_strategy = OcrStrategy(OCR_CONFIGS)
+
+
+def ocr_images_batch(paths: List[str], lang: Optional[str] = None, psm: Optional[str] = None) -> Dict[str, Tuple[str, float]]:
+	"""OCR many images with a single Tesseract process.
+
+	Images are prepared as for :func:`extract_text_from_image`, written to a temp folder
+	and listed in a file that Tesseract reads in one run, so the language models load
+	once per batch. TSV output carries a page number per listed image, which maps the
+	words back to their source. Returns {path: (text, mean confidence)}; images missing
+	from the result (unreadable, or the whole batch failed) should go through
+	:func:`extract_text_from_image`. Uses the config that has won most often so far.
+	"""
+	if not paths:
+		return {}
+	_ensure_tesseract_path()
+	if lang is None or psm is None:
+		lang, psm = _ocr_strategy.ordered()[0]
+	results: Dict[str, Tuple[str, float]] = {}
+	with tempfile.TemporaryDirectory(prefix="organizer-ocr-") as tmp:
+		listed: List[str] = []
+		lines: List[str] = []
+		for path in paths:
+			try:
+				with open_image(path) as img:
+					prepared = os.path.join(tmp, f"{len(listed)}.png")
+					prepare_image(img).save(prepared)
+			except Exception as e:
+				print(f"[yellow]Skipping {path} in OCR batch: {e}[/]")
+				continue
+			listed.append(path)
+			lines.append(prepared)
+		if not listed:
+			return {}
+		list_file = os.path.join(tmp, "images.txt")
+		with open(list_file, "w", encoding="utf-8") as f:
+			f.write("\n".join(lines) + "\n")
+		cmd = [pytesseract.pytesseract.tesseract_cmd, list_file, "stdout", "-l", lang, *psm.split(), "tsv"]
+		try:
+			with STATS.timer("ocr.batch"):
+				proc = subprocess.run(cmd, capture_output=True, check=True)
+		except (OSError, subprocess.CalledProcessError) as e:
+			print(f"[yellow]Batch OCR failed, falling back to per-image OCR: {e}[/]")
+			STATS.count("ocr.batch.failed")
+			return {}
+		STATS.count("ocr.batch.images", len(listed))
+
+	pages: Dict[int, Dict[str, list]] = {}
+	rows = proc.stdout.decode("utf-8", errors="ignore").splitlines()
+	for row in rows[1:]:
+		cols = row.split("\t")
+		if len(cols) < 12 or cols[0] != "5":  # level 5 = word
+			continue
+		page = pages.setdefault(int(cols[1]), {"block_num": [], "par_num": [], "line_num": [], "conf": [], "text": []})
+		page["block_num"].append(cols[2])
+		page["par_num"].append(cols[3])
+		page["line_num"].append(cols[4])
+		page["conf"].append(cols[10])
+		page["text"].append(cols[11])
+	for page_num, path in enumerate(listed, start=1):
+		results[path] = _words_to_text(pages[page_num]) if page_num in pages else ("", 0.0)
+	if results:
+		_ocr_strategy.wins[(lang, psm)] += sum(1 for _, conf in results.values() if conf >= _ocr_strategy.min_confidence)
+	return results
+
+
 def extract_text_from_image(path: str) -> str:
 	_ensure_tesseract_path()
 	try:
-		with Image.open(path) as img:
-			# Convert to RGB if needed
-			if img.mode != 'RGB':
-				img = img.convert('RGB')
-			
-			# Improve image quality for better OCR
-			# Resize if too small
-			if img.width < 300 or img.height < 100:
-				img = img.resize((img.width * 2, img.height * 2), Image.Resampling.LANCZOS)
-			
-			# Try to get text with multiple language combinations and configurations
-			text = ""
-			configs = [
-				('deu+eng', '--psm 6'),  # Uniform block of text
-				('eng+deu', '--psm 6'),
-				('deu+eng', '--psm 3'),  # Fully automatic page segmentation
-				('eng+deu', '--psm 3'),
-				('eng', '--psm 6'),
-				('deu', '--psm 6'),
-			]
-			
-			for lang, psm in configs:
-				try:
-					text = pytesseract.image_to_string(img, lang=lang, config=psm)
-					if text.strip():
-						print(f"[green]OCR successful for {path} with language: {lang}, config: {psm}[/]")
-						break
-				except Exception as e:
-					print(f"[yellow]OCR failed for {path} with language {lang}, config {psm}: {e}[/]")
-					continue
-			
+		with open_image(path) as img:
+			text = _ocr_strategy.run(prepare_image(img), path)
 			if not text.strip():
 				print(f"[red]OCR failed completely for {path} - no text extracted[/]")
 			
@@ -81,73 +215,321 @@ def extract_text_from_image(path: str) -> str:
 		return ""
 
 
-def extract_text_from_pdf(path: str) -> str:
+def iter_pdf_pages_text(path: str, max_pages: Optional[int] = None) -> Iterator[str]:
+	"""Yield the text layer of a PDF one page at a time, up to ``max_pages`` pages.
+
+	Same pdfminer pipeline as ``pdfminer.high_level.extract_text``, so the pages joined
+	together equal its output for the pages read.
+	"""
+	with open(path, "rb") as fp, io.StringIO() as output:
+		rsrcmgr = PDFResourceManager()
+		device = TextConverter(rsrcmgr, output, laparams=LAParams())
+		interpreter = PDFPageInterpreter(rsrcmgr, device)
+		for page in PDFPage.get_pages(fp, maxpages=max_pages or 0):
+			interpreter.process_page(page)
+			text = output.getvalue()
+			output.seek(0)
+			output.truncate()
+			yield text
+		device.close()
+
+
+def iter_text_from_pdf(path: str, max_pages: Optional[int] = None) -> Iterator[str]:
 	# Try text layer first; fallback to OCR per page for empty pages
+	has_text = False
+	blank: List[str] = []
 	try:
-		text = pdf_extract_text(path) or ""
-		if text.strip():
-			return text
+		for page_text in iter_pdf_pages_text(path, max_pages):
+			if has_text:
+				yield page_text
+			elif page_text.strip():
+				has_text = True
+				yield "".join(blank) + page_text
+			else:
+				# Hold back empty pages until we know the PDF has a text layer at all
+				blank.append(page_text)
 	except Exception:
 		pass
+	if has_text:
+		return
 	# OCR pages if no text layer or on failure
 	try:
-		reader = PdfReader(path)
-		page_images: list[str] = []
-		for _ in reader.pages:
-			# Simplify: rely on external tools for rasterization if needed. Return empty here.
-			pass
-		return text if (text := "".join(page_images)).strip() else ""
-	except Exception:
-		return ""
+		yield from _iter_ocr_pdf_pages(path, max_pages)
+	except Exception as e:
+		print(f"[red]PDF OCR failed for {path}: {e}[/]")
 
 
-def extract_text_from_docx(path: str) -> str:
+def extract_text_from_pdf(path: str, max_pages: Optional[int] = None) -> str:
+	"""Text of a PDF, read page by page.
+
+	- max_pages: read at most this many pages (None reads the whole document)
+	"""
+	return "".join(iter_text_from_pdf(path, max_pages))
+
+
+# Threads OCRing pages of one scanned PDF; Tesseract runs out of process, so threads scale
+PDF_OCR_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+
+def _ocr_images(images: List[Image.Image], path: str) -> str:
+	texts = []
+	for img in images:
+		with img:
+			texts.append(_ocr_strategy.run(prepare_image(img), path))
+	return "\n".join(t for t in texts if t.strip())
+
+
+def _iter_ocr_pdf_pages(path: str, max_pages: Optional[int] = None) -> Iterator[str]:
+	"""OCR the images embedded in each page of a scanned PDF (no rasterizer needed).
+
+	Pages are decoded in order on this thread (pypdf readers are not thread-safe) and
+	OCRed on a small thread pool with a bounded look-ahead, so memory stays flat. Text is
+	yielded in page order; closing the generator cancels pages not yet started.
+	"""
+	_ensure_tesseract_path()
+	reader = PdfReader(path)
+	pages = iter(enumerate(reader.pages))
+	window = PDF_OCR_WORKERS * 2
+	read = 0
+
+	def _next_page_images() -> Optional[Tuple[int, List[Image.Image]]]:
+		nonlocal read
+		for idx, page in pages:
+			if max_pages and read >= max_pages:
+				return None
+			read += 1
+			try:
+				images = [image_file.image for image_file in page.images]
+			except Exception as e:
+				print(f"[yellow]Could not read images on page {idx + 1} of {path}: {e}[/]")
+				continue
+			if images:
+				return idx, images
+		return None
+
+	pool = ThreadPoolExecutor(max_workers=PDF_OCR_WORKERS)
+	# Submitted pages in page order; each is yielded once it and all before it are done
+	queue: Deque[Future] = deque()
+	emitted = False
 	try:
-		doc = Document(path)
-		return "\n".join(p.text for p in doc.paragraphs)
-	except Exception:
-		return ""
+		while True:
+			while len(queue) < window:
+				nxt = _next_page_images()
+				if nxt is None:
+					break
+				queue.append(pool.submit(_ocr_images, nxt[1], path))
+			if not queue:
+				return
+			text = queue.popleft().result()
+			if text.strip():
+				yield ("\n" if emitted else "") + text
+				emitted = True
+	finally:
+		for future in queue:
+			future.cancel()
+		pool.shutdown(wait=True)
 
 
-def extract_text_from_pptx(path: str) -> str:
+def iter_text_from_image(path: str) -> Iterator[str]:
+	yield extract_text_from_image(path)
+
+
+def _joined_with_fallback(native: Callable[[str], Iterator[str]], fallback: Callable[[str], Iterator[str]], path: str) -> Iterator[str]:
+	# Lines joined by "\n"; if the zip/XML reader fails before producing anything, the
+	# python-docx/python-pptx object model gets a go
+	emitted = False
 	try:
-		prs = Presentation(path)
-		texts = []
-		for slide in prs.slides:
-			for shape in slide.shapes:
-				if hasattr(shape, "text"):
-					texts.append(shape.text)
-		return "\n".join(texts)
+		for text in native(path):
+			yield ("\n" if emitted else "") + text
+			emitted = True
+		return
 	except Exception:
-		return ""
+		if emitted:
+			return
+	try:
+		for text in fallback(path):
+			yield ("\n" if emitted else "") + text
+			emitted = True
+	except Exception:
+		return
 
 
-def extract_text_from_xlsx(path: str) -> str:
+def _docx_paragraphs_via_python_docx(path: str) -> Iterator[str]:
+	doc = Document(path)
+	for p in doc.paragraphs:
+		yield p.text
+
+
+def _pptx_shape_texts_via_python_pptx(path: str) -> Iterator[str]:
+	prs = Presentation(path)
+	for slide in prs.slides:
+		for shape in slide.shapes:
+			if hasattr(shape, "text"):
+				yield shape.text
+
+
+def iter_text_from_docx(path: str) -> Iterator[str]:
+	yield from _joined_with_fallback(iter_docx_paragraphs, _docx_paragraphs_via_python_docx, path)
+
+
+def iter_text_from_pptx(path: str) -> Iterator[str]:
+	yield from _joined_with_fallback(iter_pptx_shape_texts, _pptx_shape_texts_via_python_pptx, path)
+
+
+# Cells read from a spreadsheet (xlsx or csv) at most, across all sheets
+SPREADSHEET_MAX_CELLS = 50000
+
+
+def _xlsx_rows_via_openpyxl(path: str) -> Iterator[str]:
+	wb = load_workbook(path, data_only=True, read_only=True)
+	budget = SPREADSHEET_MAX_CELLS
 	try:
-		wb = load_workbook(path, data_only=True, read_only=True)
-		texts = []
 		for ws in wb:
 			for row in ws.iter_rows(values_only=True):
-				for cell in row:
-					if cell is None:
-						continue
-					texts.append(str(cell))
-					if len(texts) > 50000:
-						break
-		return "\n".join(texts)
-	except Exception:
-		return ""
+				cells = [str(cell) for cell in row if cell is not None][:budget]
+				if cells:
+					budget -= len(cells)
+					yield "\n".join(cells)
+				if budget <= 0:
+					return
+	finally:
+		wb.close()
 
 
-def extract_text_from_txt(path: str) -> str:
+def _xlsx_rows_native(path: str) -> Iterator[str]:
+	for row in iter_xlsx_rows(path, SPREADSHEET_MAX_CELLS):
+		yield "\n".join(row)
+
+
+def iter_text_from_xlsx(path: str) -> Iterator[str]:
+	yield from _joined_with_fallback(_xlsx_rows_native, _xlsx_rows_via_openpyxl, path)
+
+
+def _iter_lines(chunks: Iterator[str]) -> Iterator[str]:
+	# Re-split decoded chunks into lines (ends kept) for the csv module
+	tail = ""
+	for chunk in chunks:
+		lines = (tail + chunk).splitlines(keepends=True)
+		tail = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+		yield from lines
+	if tail:
+		yield tail
+
+
+def iter_text_from_csv(path: str) -> Iterator[str]:
+	"""Non-empty fields, one per line, from at most SPREADSHEET_MAX_CELLS cells.
+
+	Decoding goes through iter_text_from_txt, so the byte budget and encoding detection
+	are the same as for text files; the delimiter is sniffed from the first lines.
+	"""
+	lines = _iter_lines(iter_text_from_txt(path))
+	head = list(islice(lines, 20))
+	try:
+		dialect = csv.Sniffer().sniff("".join(head), delimiters=",;\t|")
+	except csv.Error:
+		dialect = csv.excel
+	budget = SPREADSHEET_MAX_CELLS
+	first = True
+	try:
+		for row in csv.reader(chain(head, lines), dialect):
+			cells = [cell for cell in row if cell.strip()][:budget]
+			if not cells:
+				continue
+			budget -= len(cells)
+			yield ("" if first else "\n") + "\n".join(cells)
+			first = False
+			if budget <= 0:
+				return
+	except csv.Error:
+		return
+
+
+# Bytes of a text file that are read at most; override with the TXT_MAX_BYTES env variable
+TXT_MAX_BYTES = int(os.getenv("TXT_MAX_BYTES", str(16 * 1024 * 1024)))
+# Leading bytes used to detect the encoding
+TXT_SAMPLE_BYTES = 64 * 1024
+TXT_CHUNK_BYTES = 1024 * 1024
+
+# UTF-32 first: its little-endian BOM starts with the UTF-16 one
+_BOMS = [
+	(codecs.BOM_UTF32_LE, "utf-32"),
+	(codecs.BOM_UTF32_BE, "utf-32"),
+	(codecs.BOM_UTF8, "utf-8-sig"),
+	(codecs.BOM_UTF16_LE, "utf-16"),
+	(codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def _detect_encoding(sample: bytes) -> str:
+	for bom, encoding in _BOMS:
+		if sample.startswith(bom):
+			return encoding
+	try:
+		# final=False: the sample may end in the middle of a multi-byte character
+		codecs.getincrementaldecoder("utf-8")("strict").decode(sample, final=False)
+		return "utf-8"
+	except UnicodeDecodeError:
+		pass
+	detector = UniversalDetector()
+	for start in range(0, len(sample), 4096):
+		detector.feed(sample[start:start + 4096])
+		if detector.done:
+			break
+	detector.close()
+	encoding = detector.result.get("encoding") or "utf-8"
+	try:
+		codecs.lookup(encoding)
+	except LookupError:
+		encoding = "utf-8"
+	return encoding
+
+
+def iter_text_from_txt(path: str, max_bytes: Optional[int] = None) -> Iterator[str]:
+	"""Decode a text file in chunks, reading at most ``max_bytes`` (TXT_MAX_BYTES).
+
+	The encoding comes from a BOM, a strict UTF-8 check or, failing both, chardet on the
+	first TXT_SAMPLE_BYTES only, so cost no longer grows with file size.
+	"""
+	budget = TXT_MAX_BYTES if max_bytes is None else max_bytes
 	try:
 		with open(path, "rb") as f:
-			raw = f.read()
-		enc = chardet.detect(raw).get("encoding") or "utf-8"
-		return raw.decode(enc, errors="ignore")
+			data = f.read(min(TXT_SAMPLE_BYTES, budget))
+			decoder = codecs.getincrementaldecoder(_detect_encoding(data))(errors="ignore")
+			budget -= len(data)
+			while data:
+				text = decoder.decode(data)
+				if text:
+					yield text
+				data = f.read(min(TXT_CHUNK_BYTES, budget)) if budget > 0 else b""
+				budget -= len(data)
+			text = decoder.decode(b"", final=True)
+			if text:
+				yield text
 	except Exception:
-		return ""
+		return
+
 
+def extract_text_from_docx(path: str) -> str:
+	return "".join(iter_text_from_docx(path))
+
+
+def extract_text_from_pptx(path: str) -> str:
+	return "".join(iter_text_from_pptx(path))
+
+
+def extract_text_from_xlsx(path: str) -> str:
+	return "".join(iter_text_from_xlsx(path))
+
+
+def extract_text_from_csv(path: str) -> str:
+	return "".join(iter_text_from_csv(path))
+
+
+def extract_text_from_txt(path: str) -> str:
+	return "".join(iter_text_from_txt(path))
+
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tif", ".tiff"}
 
 EXTENSIONS = {
 	".pdf": extract_text_from_pdf,
@@ -159,13 +541,41 @@ EXTENSIONS = {
 	".docx": extract_text_from_docx,
 	".pptx": extract_text_from_pptx,
 	".xlsx": extract_text_from_xlsx,
+	".csv": extract_text_from_csv,
 	".txt": extract_text_from_txt,
 }
 
+# Chunked counterparts of EXTENSIONS: generators yielding pieces of the document text
+# whose concatenation is the full text. Consumers may stop early by closing them.
+CHUNK_EXTENSIONS: Dict[str, Callable[[str], Iterator[str]]] = {
+	".pdf": iter_text_from_pdf,
+	".png": iter_text_from_image,
+	".jpg": iter_text_from_image,
+	".jpeg": iter_text_from_image,
+	".tif": iter_text_from_image,
+	".tiff": iter_text_from_image,
+	".docx": iter_text_from_docx,
+	".pptx": iter_text_from_pptx,
+	".xlsx": iter_text_from_xlsx,
+	".csv": iter_text_from_csv,
+	".txt": iter_text_from_txt,
+}
+
+
+def iter_text_from_file(path: str, pdf_max_pages: Optional[int] = None) -> Iterator[str]:
+	ext = os.path.splitext(path)[1].lower()
+	extractor = CHUNK_EXTENSIONS.get(ext)
+	if not extractor:
+		return
+	chunks = iter_text_from_pdf(path, pdf_max_pages) if extractor is iter_text_from_pdf else extractor(path)
+	yield from STATS.timed_chunks("extract" + ext, chunks)
+
 
-def extract_text_from_file(path: str) -> str:
+def extract_text_from_file(path: str, pdf_max_pages: Optional[int] = None) -> str:
 	ext = os.path.splitext(path)[1].lower()
 	extractor = EXTENSIONS.get(ext)
 	if not extractor:
 		return ""
+	if extractor is extract_text_from_pdf:
+		return extractor(path, max_pages=pdf_max_pages) or ""
 	return extractor(path) or ""
@@ -1,18 +1,19 @@
 import os
+import multiprocessing
 import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 import json
 
 from .__main__ import process_directory
-from .classifier import _load_categories, _save_categories
+from .classifier import _load_categories, _save_categories, get_classifier
 
 
 class App(tk.Tk):
 	def __init__(self) -> None:
 		super().__init__()
 		self.title("Intelligent Document Organizer")
-		self.geometry("700x400")
+		self.geometry("700x440")
 
 		# Default to Unsorted folder in current directory
 		current_dir = os.getcwd()
@@ -22,7 +23,10 @@ class App(tk.Tk):
 		self.output_var = tk.StringVar(value="")  # Will auto-set to "Sorted"
 		self.interactive_var = tk.BooleanVar(value=False)
 		self.dry_run_var = tk.BooleanVar(value=False)
+		self.workers_var = tk.IntVar(value=1)
 		self.custom_folder_var = tk.StringVar(value="")
+		# Shared across runs and keyword edits so rules stay compiled
+		self.classifier = get_classifier()
 
 		self._build()
 
@@ -64,6 +68,10 @@ class App(tk.Tk):
 		row += 1
 		tk.Checkbutton(self, text="Dry Run (analyze only, don't move files)", variable=self.dry_run_var).grid(row=row, column=0, columnspan=2, sticky="w", **pad)
 
+		row += 1
+		tk.Label(self, text="Parallel Workers:", font=("Arial", 10, "bold")).grid(row=row, column=0, sticky="w", **pad)
+		tk.Spinbox(self, from_=1, to=max(1, os.cpu_count() or 1), textvariable=self.workers_var, width=5).grid(row=row, column=1, sticky="w", **pad)
+
 		row += 1
 		tk.Button(self, text="Process Files", command=self._start, bg="green", fg="white", font=("Arial", 10, "bold")).grid(row=row, column=0, **pad)
 		tk.Button(self, text="Exit", command=self.destroy, bg="red", fg="white").grid(row=row, column=1, sticky="w", **pad)
@@ -105,9 +113,9 @@ class App(tk.Tk):
 			_save_categories(categories)
 			
 			# Automatically add category name as keyword
-			from .classifier import add_custom_keywords
 			base_keywords = [folder_name.lower()]
-			add_custom_keywords(folder_name, base_keywords)
+			self.classifier.refresh()
+			self.classifier.add_custom_keywords(folder_name, base_keywords)
 			
 			# Clear input field
 			self.custom_folder_var.set("")
@@ -207,7 +215,6 @@ class App(tk.Tk):
 						_save_categories(categories)
 						
 						# Automatically add category name as keyword
-						from .classifier import add_custom_keywords
 						base_keywords = [new_category.lower()]
 						
 						# Ask for additional keywords
@@ -219,7 +226,8 @@ class App(tk.Tk):
 							base_keywords.extend(additional_keywords)
 						
 						# Save keywords
-						add_custom_keywords(new_category, base_keywords)
+						self.classifier.refresh()
+						self.classifier.add_custom_keywords(new_category, base_keywords)
 						
 						# Refresh the listbox
 						listbox.delete(0, tk.END)
@@ -260,10 +268,14 @@ class App(tk.Tk):
 		
 		interactive = self.interactive_var.get()
 		dry_run = self.dry_run_var.get()
+		try:
+			workers = max(1, int(self.workers_var.get()))
+		except (tk.TclError, ValueError):
+			workers = 1
 
 		def run():
 			try:
-				process_directory(input_dir=inp, output_base=out, interactive=interactive, dry_run=dry_run)
+				process_directory(input_dir=inp, output_base=out, interactive=interactive, dry_run=dry_run, classifier=self.classifier, workers=workers)
 				messagebox.showinfo("Complete", "File processing completed successfully!")
 			except Exception as e:
 				messagebox.showerror("Error", f"Processing failed: {str(e)}")
@@ -272,6 +284,7 @@ class App(tk.Tk):
 
 
 def main() -> None:
+	multiprocessing.freeze_support()
 	app = App()
 	app.mainloop()
 
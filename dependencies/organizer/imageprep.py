@@ -0,0 +1,124 @@
+"""Image preparation for OCR.
+
+Tesseract's cost grows with pixel count while its accuracy stops improving well below
+the resolution of a phone photo, so images are decoded small where the format allows
+(JPEG ``draft``), flattened to grayscale, capped at OCR_MAX_SIDE pixels and binarized
+with a global Otsu threshold, which is what Tesseract would otherwise do itself. Only
+images whose resolution is genuinely too low are upscaled.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from PIL import Image
+
+# Longest side (px) handed to Tesseract; A4 at ~250 DPI still fits. Override with OCR_MAX_SIDE
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "3000"))
+# Images smaller than SMALL_WIDTH x SMALL_HEIGHT are upscaled unless they report at least
+# OCR_MIN_DPI: towards OCR_TARGET_DPI if they report a DPI, doubled (as before) if not
+SMALL_WIDTH = 300
+SMALL_HEIGHT = 100
+OCR_MIN_DPI = 150
+OCR_TARGET_DPI = 300
+# Upscaling never goes beyond this; many files carry a placeholder 72 DPI
+MAX_UPSCALE = 2.0
+
+
+@contextmanager
+def _stage(timings: Optional[Dict[str, float]], name: str) -> Iterator[None]:
+	if timings is None:
+		yield
+		return
+	start = time.perf_counter()
+	try:
+		yield
+	finally:
+		timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def _dpi(img: Image.Image) -> Optional[float]:
+	dpi = img.info.get("dpi")
+	try:
+		value = float(min(dpi[0], dpi[1]))
+	except (TypeError, ValueError, IndexError):
+		return None
+	return value if value > 1 else None
+
+
+def open_image(path: str, timings: Optional[Dict[str, float]] = None) -> Image.Image:
+	"""Open an image for OCR; JPEGs are decoded in grayscale at a reduced scale.
+
+	``draft`` lets the JPEG decoder skip detail that :func:`prepare_image` would throw
+	away anyway (it never goes below the requested size). The reported DPI is scaled
+	down with the image so the upscaling rule still sees the true resolution.
+	"""
+	with _stage(timings, "open"):
+		img = Image.open(path)
+		if img.format == "JPEG":
+			width, height = img.size
+			ratio = min(1.0, OCR_MAX_SIDE / max(width, height))
+			img.draft("L", (max(1, int(width * ratio)), max(1, int(height * ratio))))
+			dpi = _dpi(img)
+			if dpi and img.size[0] != width:
+				scaled = dpi * img.size[0] / width
+				img.info["dpi"] = (scaled, scaled)
+		img.load()
+	return img
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+	# Transparent areas become white, not black, before dropping to grayscale
+	if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+		rgba = img.convert("RGBA")
+		background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+		return Image.alpha_composite(background, rgba).convert("L")
+	return img if img.mode == "L" else img.convert("L")
+
+
+def _otsu_threshold(histogram: List[int]) -> int:
+	total = sum(histogram)
+	weighted_total = sum(i * count for i, count in enumerate(histogram))
+	best, best_var = 127, -1.0
+	below = weighted_below = 0
+	for t, count in enumerate(histogram):
+		below += count
+		if below == 0:
+			continue
+		above = total - below
+		if above == 0:
+			break
+		weighted_below += t * count
+		mean_below = weighted_below / below
+		mean_above = (weighted_total - weighted_below) / above
+		var = below * above * (mean_below - mean_above) ** 2
+		if var > best_var:
+			best, best_var = t, var
+	return best
+
+
+def prepare_image(img: Image.Image, binarize: bool = True, timings: Optional[Dict[str, float]] = None) -> Image.Image:
+	"""Grayscale, size-capped (and by default binarized) copy of ``img`` for Tesseract.
+
+	- timings: if given, seconds spent per stage are added to it
+	"""
+	with _stage(timings, "grayscale"):
+		dpi = _dpi(img)
+		img = _flatten(img)
+	with _stage(timings, "resize"):
+		width, height = img.size
+		factor = 1.0
+		# Upscale only small images that are not known to be high resolution
+		if (width < SMALL_WIDTH or height < SMALL_HEIGHT) and (dpi is None or dpi < OCR_MIN_DPI):
+			factor = MAX_UPSCALE if dpi is None else min(OCR_TARGET_DPI / dpi, MAX_UPSCALE)
+		factor = min(factor, OCR_MAX_SIDE / max(width, height))
+		if factor < 1.0:
+			# Area averaging: cheap and keeps strokes intact when shrinking
+			img = img.resize((max(1, round(width * factor)), max(1, round(height * factor))), Image.Resampling.BOX)
+		elif factor > 1.05:
+			img = img.resize((round(width * factor), round(height * factor)), Image.Resampling.LANCZOS)
+	if binarize:
+		with _stage(timings, "binarize"):
+			threshold = _otsu_threshold(img.histogram())
+			img = img.point([255 if v > threshold else 0 for v in range(256)], "1")
+	return img
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+
+class LearningJournal:
+	"""Append-only store for learned corrections.
+
+	``learning.json`` stays the snapshot (same format as before). New corrections are
+	appended as one JSON line each to a journal next to it, so a correction costs a single
+	small write. Once the journal grows past ``compact_every`` entries it is rotated aside
+	and folded into a fresh snapshot on a background thread; the snapshot is written to a
+	temp file and swapped in with ``os.replace``, so a crash never leaves a half-written
+	store. Loading replays snapshot, rotated journal and live journal in that order.
+	"""
+
+	def __init__(self, snapshot_path: str, compact_every: int = 200) -> None:
+		self.snapshot_path = snapshot_path
+		self.journal_path = os.path.splitext(snapshot_path)[0] + ".journal.jsonl"
+		self.compacting_path = self.journal_path + ".compacting"
+		self.compact_every = compact_every
+		self.pending = 0
+		self._lock = threading.Lock()
+		self._worker: Optional[threading.Thread] = None
+
+	def load(self) -> Dict[str, str]:
+		with open(self.snapshot_path, "r", encoding="utf-8") as f:
+			store: Dict[str, str] = json.load(f)
+		self.pending = 0
+		for path in (self.compacting_path, self.journal_path):
+			self.pending += self._replay(path, store)
+		return store
+
+	def _replay(self, path: str, store: Dict[str, str]) -> int:
+		count = 0
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				for line in f:
+					try:
+						entry = json.loads(line)
+					except ValueError:
+						# Torn last line from a crash mid-append
+						continue
+					store[entry["snippet"]] = entry["category"]
+					count += 1
+		except FileNotFoundError:
+			pass
+		return count
+
+	def append(self, snippet: str, category: str) -> None:
+		line = json.dumps({"snippet": snippet, "category": category}, ensure_ascii=False)
+		with self._lock:
+			with open(self.journal_path, "a", encoding="utf-8") as f:
+				f.write(line + "\n")
+				f.flush()
+				os.fsync(f.fileno())
+			self.pending += 1
+
+	def write_snapshot(self, store: Dict[str, str]) -> None:
+		tmp = self.snapshot_path + ".tmp"
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump(store, f, ensure_ascii=False, indent=2)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp, self.snapshot_path)
+
+	def maybe_compact(self, store: Dict[str, str]) -> None:
+		if self.pending >= self.compact_every:
+			self.compact(store)
+
+	def compact(self, store: Dict[str, str], wait: bool = False) -> None:
+		"""Fold the journal into the snapshot. ``store`` must hold everything journaled so far."""
+		with self._lock:
+			if self._worker is not None and self._worker.is_alive():
+				return
+			if os.path.exists(self.journal_path):
+				if os.path.exists(self.compacting_path):
+					# Left over from an interrupted compaction: keep both, oldest first
+					with open(self.journal_path, "r", encoding="utf-8") as src, open(self.compacting_path, "a", encoding="utf-8") as dst:
+						dst.write(src.read())
+					os.remove(self.journal_path)
+				else:
+					os.replace(self.journal_path, self.compacting_path)
+			elif not os.path.exists(self.compacting_path):
+				return
+			snapshot = dict(store)
+			self.pending = 0
+			self._worker = threading.Thread(target=self._finish_compaction, args=(snapshot,), daemon=True)
+			self._worker.start()
+		if wait:
+			self._worker.join()
+
+	def _finish_compaction(self, snapshot: Dict[str, str]) -> None:
+		try:
+			self.write_snapshot(snapshot)
+			os.remove(self.compacting_path)
+		except OSError as e:
+			# The rotated journal is still replayed on load; retry on the next compaction
+			print(f"[yellow]Learning store compaction failed: {e}[/]")
@@ -0,0 +1,185 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .classifier import DATA_DIR
+from .organize import MOVE_COPIED_KEPT, MoveResult, move_file
+
+MANIFEST_PATH = os.path.abspath(os.path.join(DATA_DIR, "runs.sqlite3"))
+
+# Per-file states, in the order a file normally goes through them
+SCANNED = "scanned"
+EXTRACTED = "extracted"
+CLASSIFIED = "classified"
+MOVED = "moved"
+# Copied to its category folder but the original could not be deleted
+COPIED = "copied"
+FAILED = "failed"
+UNDONE = "undone"
+
+
+class FileRecord(NamedTuple):
+	path: str
+	size: Optional[int]
+	mtime_ns: Optional[int]
+	state: str
+	category: Optional[str]
+	target: Optional[str]
+	method: Optional[str]
+	error: Optional[str]
+
+
+def _key(path: str) -> str:
+	return os.path.normcase(os.path.abspath(path))
+
+
+class RunManifest:
+	"""Per-run record of what happened to every file, kept in SQLite.
+
+	Updates are buffered and written in batches (every ``batch_size`` updates or
+	``flush_seconds``, whichever comes first), so a million-file run costs a few thousand
+	commits rather than millions; a crash loses at most the last batch, whose files are
+	simply redone on resume. Safe to call from several threads.
+	"""
+
+	def __init__(self, path: str = MANIFEST_PATH, batch_size: int = 500, flush_seconds: float = 2.0) -> None:
+		self.path = path
+		self.batch_size = batch_size
+		self.flush_seconds = flush_seconds
+		self.run_id: Optional[int] = None
+		self._lock = threading.Lock()
+		self._pending: List[Tuple] = []
+		self._last_flush = time.monotonic()
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+		self._db.execute("PRAGMA journal_mode=WAL")
+		self._db.execute("PRAGMA synchronous=NORMAL")
+		self._db.execute(
+			"CREATE TABLE IF NOT EXISTS runs ("
+			" id INTEGER PRIMARY KEY, input_dir TEXT NOT NULL, base TEXT NOT NULL,"
+			" started REAL NOT NULL, finished REAL, status TEXT NOT NULL)"
+		)
+		self._db.execute(
+			"CREATE TABLE IF NOT EXISTS files ("
+			" run_id INTEGER NOT NULL, path TEXT NOT NULL, size INTEGER, mtime_ns INTEGER,"
+			" state TEXT NOT NULL, category TEXT, target TEXT, method TEXT, error TEXT,"
+			" updated REAL NOT NULL, PRIMARY KEY (run_id, path))"
+		)
+		self._db.commit()
+
+	def start(self, input_dir: str, base: str, resume: bool = False) -> bool:
+		"""Begin a run; with ``resume``, continue the last unfinished run over the same folders.
+
+		Returns True if an earlier run is being resumed.
+		"""
+		input_key, base_key = _key(input_dir), _key(base)
+		with self._lock:
+			row = None
+			if resume:
+				row = self._db.execute(
+					"SELECT id FROM runs WHERE input_dir=? AND base=? AND status!='done' ORDER BY id DESC LIMIT 1",
+					(input_key, base_key),
+				).fetchone()
+			if row:
+				self.run_id = row[0]
+				self._db.execute("UPDATE runs SET status='running', finished=NULL WHERE id=?", (self.run_id,))
+			else:
+				cur = self._db.execute(
+					"INSERT INTO runs (input_dir, base, started, status) VALUES (?, ?, ?, 'running')",
+					(input_key, base_key, time.time()),
+				)
+				self.run_id = cur.lastrowid
+			self._db.commit()
+		return row is not None
+
+	def records(self, run_id: Optional[int] = None) -> Dict[str, FileRecord]:
+		"""Files of a run (default: the current one) keyed by path."""
+		self.flush()
+		with self._lock:
+			rows = self._db.execute(
+				"SELECT path, size, mtime_ns, state, category, target, method, error FROM files WHERE run_id=? ORDER BY updated",
+				(self.run_id if run_id is None else run_id,),
+			).fetchall()
+		return {row[0]: FileRecord(*row) for row in rows}
+
+	def record(self, path: str, state: str, size: Optional[int] = None, mtime_ns: Optional[int] = None, category: Optional[str] = None, target: Optional[str] = None, method: Optional[str] = None, error: Optional[str] = None) -> None:
+		with self._lock:
+			self._pending.append((self.run_id, path, size, mtime_ns, state, category, target, method, error, time.time()))
+			due = len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_seconds
+		if due:
+			self.flush()
+
+	def record_move(self, path: str, moved: Optional[MoveResult], error: Optional[BaseException]) -> None:
+		"""Record the outcome of a move as reported by :class:`~organizer.organize.MovePool`."""
+		if error is not None:
+			self.record(path, FAILED, error=str(error))
+		else:
+			self.record(path, COPIED if moved.method == MOVE_COPIED_KEPT else MOVED, target=moved.path, method=moved.method)
+
+	def flush(self) -> None:
+		with self._lock:
+			if self._pending:
+				# Fields left out of an update (None) keep what an earlier state recorded
+				self._db.executemany(
+					"INSERT INTO files (run_id, path, size, mtime_ns, state, category, target, method, error, updated)"
+					" VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+					" ON CONFLICT (run_id, path) DO UPDATE SET"
+					" size=COALESCE(excluded.size, size), mtime_ns=COALESCE(excluded.mtime_ns, mtime_ns),"
+					" state=excluded.state, category=COALESCE(excluded.category, category),"
+					" target=COALESCE(excluded.target, target), method=COALESCE(excluded.method, method),"
+					" error=excluded.error, updated=excluded.updated",
+					self._pending,
+				)
+				self._db.commit()
+				self._pending = []
+			self._last_flush = time.monotonic()
+
+	def finish(self, status: str = "done") -> None:
+		self.flush()
+		with self._lock:
+			self._db.execute("UPDATE runs SET status=?, finished=? WHERE id=?", (status, time.time(), self.run_id))
+			self._db.commit()
+
+	def last_run(self) -> Optional[int]:
+		with self._lock:
+			row = self._db.execute("SELECT MAX(id) FROM runs").fetchone()
+		return row[0] if row else None
+
+	def close(self) -> None:
+		self.flush()
+		with self._lock:
+			self._db.close()
+
+
+def undo_run(manifest: RunManifest, run_id: int) -> Tuple[int, List[Tuple[str, str]]]:
+	"""Put every file a run moved back where it came from, newest move first.
+
+	Copies whose original was kept are deleted instead (if still the same size). Returns
+	the number of files restored and the ones that could not be, with reasons.
+	"""
+	manifest.run_id = run_id
+	restored = 0
+	failed: List[Tuple[str, str]] = []
+	for rec in reversed(list(manifest.records(run_id).values())):
+		if rec.state not in (MOVED, COPIED) or not rec.target:
+			continue
+		try:
+			if not os.path.exists(rec.target):
+				raise FileNotFoundError(f"{rec.target} no longer exists")
+			if rec.state == COPIED or rec.method == MOVE_COPIED_KEPT:
+				if os.path.getsize(rec.target) != os.path.getsize(rec.path):
+					raise ValueError(f"{rec.target} differs from the original; left in place")
+				os.remove(rec.target)
+			else:
+				if os.path.exists(rec.path):
+					raise FileExistsError(f"{rec.path} exists again; left in place")
+				os.makedirs(os.path.dirname(rec.path), exist_ok=True)
+				move_file(rec.target, rec.path)
+			manifest.record(rec.path, UNDONE)
+			restored += 1
+		except Exception as e:
+			failed.append((rec.path, str(e)))
+	manifest.flush()
+	return restored, failed
@@ -0,0 +1,215 @@
+"""Lightweight OOXML text extraction straight from the zip container.
+
+Covers docx, pptx and xlsx. Only the XML parts holding text are opened and streamed with ``iterparse``; images and
+other media inside the package are never decompressed. Output mirrors what python-docx
+and python-pptx/openpyxl return for the same documents, which remain the fallback in
+:mod:`organizer.extractors`.
+"""
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def _iter_body_paragraphs(fp: IO[bytes]) -> Iterator[str]:
+	# Body-level <w:p> only, like Document.paragraphs; text of runs directly in the
+	# paragraph or in a hyperlink, like Paragraph.text
+	stack: List[str] = []
+	parts: List[str] = []
+	for event, elem in ET.iterparse(fp, events=("start", "end")):
+		if event == "start":
+			stack.append(elem.tag)
+			continue
+		stack.pop()
+		tag = elem.tag
+		depth = len(stack)
+		# document/body/p/(hyperlink/)r/<child>
+		in_run = depth >= 4 and stack[-1] == W + "r" and stack[1] == W + "body" and stack[2] == W + "p" and (
+			depth == 4 or (depth == 5 and stack[3] == W + "hyperlink")
+		)
+		if in_run:
+			if tag == W + "t":
+				parts.append(elem.text or "")
+			elif tag in (W + "tab", W + "ptab"):
+				parts.append("\t")
+			elif tag in (W + "br", W + "cr"):
+				if elem.get(W + "type") in (None, "textWrapping"):
+					parts.append("\n")
+			elif tag == W + "noBreakHyphen":
+				parts.append("-")
+		elif depth == 2 and stack[1] == W + "body":
+			if tag == W + "p":
+				yield "".join(parts)
+			parts = []
+			# Done with this block; drop it so memory stays flat on long documents
+			elem.clear()
+
+
+def iter_docx_paragraphs(path: str) -> Iterator[str]:
+	with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as fp:
+		yield from _iter_body_paragraphs(fp)
+
+
+def _relationships(zf: zipfile.ZipFile, part: str) -> Dict[str, Tuple[str, str]]:
+	# rId -> (relationship type, target part name) from the part's .rels
+	folder, name = posixpath.split(part)
+	with zf.open(posixpath.join(folder, "_rels", name + ".rels")) as fp:
+		rels = {}
+		for rel in ET.parse(fp).getroot().iter(PKG_REL + "Relationship"):
+			target = rel.get("Target") or ""
+			if target.startswith("/"):
+				target = target.lstrip("/")
+			else:
+				target = posixpath.normpath(posixpath.join(folder, target))
+			rels[rel.get("Id")] = (rel.get("Type") or "", target)
+	return rels
+
+
+def _ordered_parts(zf: zipfile.ZipFile, part: str, tag: str) -> List[str]:
+	# Parts referenced by <tag r:id=...> elements of ``part``, in document order
+	rels = _relationships(zf, part)
+	with zf.open(part) as fp:
+		root = ET.parse(fp).getroot()
+	return [rels[el.get(R + "id")][1] for el in root.iter(tag) if el.get(R + "id") in rels]
+
+
+def _iter_slide_shape_texts(fp: IO[bytes]) -> Iterator[str]:
+	# Top-level <p:sp> of the shape tree, like slide.shapes filtered on hasattr(shape, "text")
+	stack: List[str] = []
+	paragraphs: List[str] = []
+	runs: List[str] = []
+	for event, elem in ET.iterparse(fp, events=("start", "end")):
+		if event == "start":
+			stack.append(elem.tag)
+			continue
+		stack.pop()
+		tag = elem.tag
+		# sld/cSld/spTree/sp/txBody/p/...
+		if len(stack) >= 6 and stack[3] == P + "sp" and stack[4] == P + "txBody":
+			if tag == A + "t" and stack[-1] in (A + "r", A + "fld"):
+				runs.append(elem.text or "")
+			elif tag == A + "br" and stack[-1] == A + "p":
+				runs.append("\v")
+		elif len(stack) == 5 and stack[3] == P + "sp" and stack[4] == P + "txBody" and tag == A + "p":
+			paragraphs.append("".join(runs))
+			runs = []
+		elif len(stack) == 3 and stack[2] == P + "spTree":
+			if tag == P + "sp":
+				yield "\n".join(paragraphs)
+			paragraphs = []
+			runs = []
+			elem.clear()
+
+
+def iter_pptx_shape_texts(path: str) -> Iterator[str]:
+	with zipfile.ZipFile(path) as zf:
+		# Slide order comes from presentation.xml's sldIdLst
+		for part in _ordered_parts(zf, "ppt/presentation.xml", P + "sldId"):
+			with zf.open(part) as fp:
+				yield from _iter_slide_shape_texts(fp)
+
+
+def _string_item_text(elem: ET.Element) -> str:
+	# Plain text of a shared/inline string: <t> directly or in rich-text runs, without
+	# phonetic hints, like openpyxl's Text.content
+	parts = [elem.findtext(S + "t") or ""]
+	parts.extend(r.findtext(S + "t") or "" for r in elem.findall(S + "r"))
+	return "".join(parts).replace("x005F_", "")
+
+
+class _SharedStrings:
+	"""Shared string table parsed only as far as the cells read so far reach into it."""
+
+	def __init__(self, zf: zipfile.ZipFile, part: Optional[str]) -> None:
+		self._strings: List[str] = []
+		self._fp = zf.open(part) if part else None
+		self._items = self._iter_items() if self._fp else iter(())
+
+	def _iter_items(self) -> Iterator[str]:
+		for _, elem in ET.iterparse(self._fp):
+			if elem.tag == S + "si":
+				yield _string_item_text(elem)
+				elem.clear()
+
+	def get(self, index: int) -> Optional[str]:
+		while len(self._strings) <= index:
+			item = next(self._items, None)
+			if item is None:
+				return None
+			self._strings.append(item)
+		return self._strings[index]
+
+	def close(self) -> None:
+		if self._fp:
+			self._fp.close()
+
+
+def _cell_value(cell: ET.Element, shared: _SharedStrings) -> Optional[str]:
+	# Cell value as str(openpyxl value); date-formatted numbers stay serial numbers
+	kind = cell.get("t", "n")
+	if kind == "inlineStr":
+		inline = cell.find(S + "is")
+		return None if inline is None else _string_item_text(inline)
+	value = cell.findtext(S + "v") or None
+	if value is None:
+		return None
+	if kind == "n":
+		try:
+			return str(float(value) if "." in value or "E" in value or "e" in value else int(value))
+		except ValueError:
+			return value
+	if kind == "s":
+		return shared.get(int(value))
+	if kind == "b":
+		return str(bool(int(value)))
+	return value
+
+
+def _iter_sheet_rows(fp: IO[bytes], shared: _SharedStrings) -> Iterator[List[str]]:
+	stack: List[ET.Element] = []
+	row: List[str] = []
+	for event, elem in ET.iterparse(fp, events=("start", "end")):
+		if event == "start":
+			stack.append(elem)
+			continue
+		stack.pop()
+		if elem.tag == S + "c":
+			value = _cell_value(elem, shared)
+			if value is not None:
+				row.append(value)
+			elem.clear()
+		elif elem.tag == S + "row":
+			if row:
+				yield row
+			row = []
+			# Drop finished rows from the tree so memory stays flat on huge sheets
+			if stack:
+				stack[-1].remove(elem)
+
+
+def iter_xlsx_rows(path: str, max_cells: Optional[int] = None) -> Iterator[List[str]]:
+	"""Non-empty cell values per row, sheet by sheet, stopping after ``max_cells`` cells."""
+	budget = max_cells
+	with zipfile.ZipFile(path) as zf:
+		rels = _relationships(zf, "xl/workbook.xml")
+		strings_part = next((target for kind, target in rels.values() if kind.endswith("/sharedStrings")), None)
+		shared = _SharedStrings(zf, strings_part)
+		try:
+			for part in _ordered_parts(zf, "xl/workbook.xml", S + "sheet"):
+				with zf.open(part) as fp:
+					for row in _iter_sheet_rows(fp, shared):
+						if budget is not None:
+							row = row[:budget]
+							budget -= len(row)
+						yield row
+						if budget is not None and budget <= 0:
+							return
+		finally:
+			shared.close()
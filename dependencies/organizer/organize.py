@@ -1,7 +1,24 @@
+import errno
+import hashlib
+import heapq
 import os
 import shutil
+import threading
 import time
-from typing import Tuple
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import count
+from typing import Any, BinaryIO, Callable, Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from rich import print
+
+from .stats import STATS
+
+# Bytes moved per copy_file_range/sendfile call or buffered read
+COPY_CHUNK = 8 * 1024 * 1024
+# Concurrent moves; copies are I/O bound, so a few threads keep a slow target busy
+IO_WORKERS = 4
 
 
 def _safe_filename(path: str) -> str:
@@ -15,50 +32,338 @@ def _safe_filename(path: str) -> str:
 	return os.path.join(base, candidate)
 
 
+# Characters Windows does not allow in folder names
+_UNSAFE_CHARS = str.maketrans({c: "_" for c in "/\\:*?\"<>|"})
+
+
+@lru_cache(maxsize=None)
+def sanitize_category(category: str) -> str:
+	return category.translate(_UNSAFE_CHARS)
+
+
 def ensure_category_dir(base_dir: str, category: str) -> str:
 	# Sanitize folder name for Windows
-	safe_name = category.replace("/", "_").replace("\\", "_").replace(":", "_").replace("*", "_").replace("?", "_").replace("\"", "_").replace("<", "_").replace(">", "_").replace("|", "_")
-	path = os.path.join(base_dir, safe_name)
+	path = os.path.join(base_dir, sanitize_category(category))
 	os.makedirs(path, exist_ok=True)
 	return path
 
 
-def move_to_category(file_path: str, base_dir: str, category: str) -> str:
-	dest_dir = ensure_category_dir(base_dir, category)
-	filename = os.path.basename(file_path)
-	target_path = os.path.join(dest_dir, filename)
-	if os.path.exists(target_path):
-		target_path = _safe_filename(target_path)
-	
+class DestinationIndex:
+	"""Per-run index of the names in each category folder, handing out unique targets.
+
+	Each folder is listed once with ``os.scandir`` when first used; after that, picking a
+	free ``name (n).ext`` is a set lookup instead of an ``exists`` probe per candidate,
+	which matters on network shares. The next counter to try is remembered per name, so
+	many files with the same name stay O(1) each. Names handed out are recorded right
+	away, so the index also keeps in-flight moves apart. Names are compared with
+	``os.path.normcase`` (case-insensitive on Windows).
+	"""
+
+	def __init__(self) -> None:
+		self._dirs: Dict[Tuple[str, str], str] = {}
+		self._names: Dict[str, Set[str]] = {}
+		self._counters: Dict[Tuple[str, str], int] = {}
+
+	def category_dir(self, base_dir: str, category: str) -> str:
+		key = (base_dir, category)
+		path = self._dirs.get(key)
+		if path is None:
+			path = self._dirs[key] = ensure_category_dir(base_dir, category)
+		return path
+
+	def _listing(self, folder: str) -> Set[str]:
+		names = self._names.get(folder)
+		if names is None:
+			with os.scandir(folder) as entries:
+				names = self._names[folder] = {os.path.normcase(entry.name) for entry in entries}
+		return names
+
+	def target(self, file_path: str, base_dir: str, category: str) -> str:
+		folder = self.category_dir(base_dir, category)
+		names = self._listing(folder)
+		name = os.path.basename(file_path)
+		if os.path.normcase(name) in names:
+			stem, ext = os.path.splitext(name)
+			key = (folder, os.path.normcase(name))
+			counter = self._counters.get(key, 1)
+			while os.path.normcase(f"{stem} ({counter}){ext}") in names:
+				counter += 1
+			self._counters[key] = counter + 1
+			name = f"{stem} ({counter}){ext}"
+		names.add(os.path.normcase(name))
+		return os.path.join(folder, name)
+
+
+def _zero_copy(fd_in: int, fd_out: int, size: int) -> bool:
+	"""Copy in the kernel; False if unsupported here before anything was copied."""
+	copied = 0
+	for name in ("copy_file_range", "sendfile"):
+		call = getattr(os, name, None)
+		if call is None:
+			continue
+		try:
+			while copied < size:
+				if name == "copy_file_range":
+					sent = call(fd_in, fd_out, min(COPY_CHUNK, size - copied))
+				else:
+					sent = call(fd_out, fd_in, copied, min(COPY_CHUNK, size - copied))
+				if sent == 0:
+					break
+				copied += sent
+			return True
+		except OSError as e:
+			if copied or e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF, errno.ENOTSOCK):
+				raise
+	return False
+
+
+def _buffered_copy(f_in: BinaryIO, f_out: BinaryIO, digest: Optional[Any]) -> None:
+	buf = bytearray(COPY_CHUNK)
+	view = memoryview(buf)
+	while True:
+		n = f_in.readinto(buf)
+		if not n:
+			break
+		if digest is not None:
+			digest.update(view[:n])
+		f_out.write(view[:n])
+
+
+def _place_exclusive(tmp: str, dst: str) -> None:
+	# Rename tmp to dst, raising FileExistsError rather than replacing a file already there
+	try:
+		os.link(tmp, dst)
+	except FileExistsError:
+		raise
+	except OSError:
+		# No hard links here (e.g. FAT, some SMB shares): claim the name, then replace the
+		# empty placeholder, which only this call can have created
+		os.close(os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+		os.replace(tmp, dst)
+		return
+	os.remove(tmp)
+
+
+def copy_file(src: str, dst: str, checksum: bool = False) -> Optional[str]:
+	"""Copy src to dst with metadata (like copy2), durably and all-or-nothing.
+
+	Data goes to a hidden temp file next to dst that is fsynced and renamed into place,
+	so a crash never leaves a truncated file under the final name. An existing dst is
+	never replaced: FileExistsError is raised instead. Without ``checksum``
+	the kernel copies (copy_file_range, then sendfile, then large buffered reads) and
+	the size is checked. With ``checksum`` the data is hashed with BLAKE2b on its single
+	pass through the copy buffer and the hex digest is returned, e.g. to record it; the
+	written file is not read back, which would double the traffic to a network share.
+	"""
+	dst_dir, name = os.path.split(dst)
+	tmp = os.path.join(dst_dir, f".{name}.{os.getpid()}.{threading.get_ident()}.part")
+	digest = hashlib.blake2b() if checksum else None
+	try:
+		with open(src, "rb") as f_in, open(tmp, "wb") as f_out:
+			size = os.fstat(f_in.fileno()).st_size
+			if digest is not None or not _zero_copy(f_in.fileno(), f_out.fileno(), size):
+				_buffered_copy(f_in, f_out, digest)
+			f_out.flush()
+			os.fsync(f_out.fileno())
+		shutil.copystat(src, tmp)
+		if os.path.getsize(tmp) != size:
+			raise OSError(f"Copy verification failed: size mismatch for {dst}")
+		_place_exclusive(tmp, dst)
+	except BaseException:
+		try:
+			os.remove(tmp)
+		except OSError:
+			pass
+		raise
+	return digest.hexdigest() if digest is not None else None
+
+
+# How a file reached its category folder
+MOVE_RENAMED = "renamed"  # same filesystem: atomic rename, no data copied
+MOVE_COPIED = "copied"  # across devices: copied, verified, original removed
+MOVE_COPIED_KEPT = "copied, original kept"  # copied, but the original could not be removed
+# Stats stage per outcome (see organizer.stats)
+_MOVE_STAGES = {MOVE_RENAMED: "move.renamed", MOVE_COPIED: "move.copied", MOVE_COPIED_KEPT: "move.copied_kept"}
+
+
+class MoveResult(NamedTuple):
+	path: str
+	method: str
+	# BLAKE2b of the copied data when the copy was checksummed
+	digest: Optional[str] = None
+
+
+def _same_device(file_path: str, dest_dir: str) -> bool:
+	try:
+		return os.stat(file_path).st_dev == os.stat(dest_dir).st_dev
+	except OSError:
+		return False
+
+
+def _copy_to_free_name(file_path: str, target_path: str, checksum: bool) -> Tuple[str, Optional[str]]:
+	# DestinationIndex lists a folder once per run, so a file may have appeared under the
+	# chosen name since; copy_file refuses to replace it and the copy gets the next free name
+	while True:
+		try:
+			return target_path, copy_file(file_path, target_path, checksum)
+		except FileExistsError:
+			target_path = _safe_filename(target_path)
+
+
+def _copy_then_remove(file_path: str, target_path: str, checksum: bool) -> Tuple[str, str, Optional[str]]:
+	target_path, digest = _copy_to_free_name(file_path, target_path, checksum)
+	try:
+		os.remove(file_path)
+	except PermissionError:
+		return target_path, MOVE_COPIED_KEPT, digest
+	return target_path, MOVE_COPIED, digest
+
+
+def _attempt_move(file_path: str, target_path: str, checksum: bool) -> MoveResult:
+	# One try: rename within a filesystem, copy + verify + delete across devices
+	start = time.perf_counter()
+	digest = None
+	if _same_device(file_path, os.path.dirname(target_path)):
+		try:
+			if os.path.exists(target_path):
+				target_path = _safe_filename(target_path)
+			os.rename(file_path, target_path)
+			method = MOVE_RENAMED
+		except OSError as e:
+			if e.errno != errno.EXDEV:
+				raise
+			# Same st_dev but still a different mount (e.g. bind mounts)
+			target_path, method, digest = _copy_then_remove(file_path, target_path, checksum)
+	else:
+		target_path, method, digest = _copy_then_remove(file_path, target_path, checksum)
+	STATS.add(_MOVE_STAGES[method], time.perf_counter() - start)
+	return MoveResult(target_path, method, digest)
+
+
+def _copy_leaving_original(file_path: str, target_path: str, checksum: bool) -> MoveResult:
+	# Final fallback: just copy and leave original
+	with STATS.timer(_MOVE_STAGES[MOVE_COPIED_KEPT]):
+		target_path, digest = _copy_to_free_name(file_path, target_path, checksum)
+	return MoveResult(target_path, MOVE_COPIED_KEPT, digest)
+
+
+def _last_attempt(file_path: str, target_path: str, checksum: bool) -> MoveResult:
+	try:
+		return _attempt_move(file_path, target_path, checksum)
+	except OSError:
+		return _copy_leaving_original(file_path, target_path, checksum)
+
+
+def move_file(file_path: str, target_path: str, checksum: bool = False) -> MoveResult:
+	"""Move a file to target_path (whose folder must exist).
+
+	Within one filesystem the file is renamed in place; across devices it is copied with
+	:func:`copy_file`, verified and then deleted. The result tells which of the two happened.
+	Locked files are retried in place, sleeping between tries; :class:`MovePool` defers
+	them instead.
+	"""
 	# Try to move with retry for file locks
 	max_retries = 3
 	for attempt in range(max_retries):
 		try:
-			# First try to copy, then remove original
-			shutil.copy2(file_path, target_path)
-			# Verify copy was successful
-			if os.path.exists(target_path) and os.path.getsize(target_path) == os.path.getsize(file_path):
-				try:
-					os.remove(file_path)
-					print(f"[green]Moved:[/] {os.path.basename(file_path)}")
-				except PermissionError:
-					print(f"[yellow]Copied (original locked):[/] {os.path.basename(file_path)}")
-				return target_path
-			else:
-				raise Exception("Copy verification failed")
-		except (PermissionError, OSError) as e:
+			return _attempt_move(file_path, target_path, checksum)
+		except (PermissionError, OSError):
 			if attempt < max_retries - 1:
 				print(f"[yellow]File locked, retrying in 1 second... (attempt {attempt + 1}/{max_retries})[/]")
+				STATS.count("move.retries")
 				time.sleep(1)
 			else:
-				# Final fallback: just copy and leave original
-				try:
-					shutil.copy2(file_path, target_path)
-					print(f"[yellow]Copied (could not move):[/] {os.path.basename(file_path)}")
-					return target_path
-				except Exception as final_e:
-					print(f"[red]Failed to process file: {file_path} - {final_e}[/]")
-					raise final_e
+				return _copy_leaving_original(file_path, target_path, checksum)
 		except Exception as e:
 			print(f"[red]Error processing file: {e}[/]")
 			raise e
+
+
+def move_to_category(file_path: str, base_dir: str, category: str, checksum: bool = False) -> MoveResult:
+	dest_dir = ensure_category_dir(base_dir, category)
+	target_path = os.path.join(dest_dir, os.path.basename(file_path))
+	if os.path.exists(target_path):
+		target_path = _safe_filename(target_path)
+	return move_file(file_path, target_path, checksum)
+
+
+# Tries per file in a MovePool; waits between them start at RETRY_DELAY seconds and double
+RETRY_ATTEMPTS = 5
+RETRY_DELAY = 0.5
+
+
+class MovePool:
+	"""Runs moves on a bounded thread pool so slow copies overlap with extraction.
+
+	Destinations are chosen on the submitting thread from a :class:`DestinationIndex`,
+	so concurrent moves into one folder never pick the same name. At most
+	``workers * 2`` moves are in flight; ``submit`` waits for the oldest beyond that.
+	``on_done(file_path, result, error)`` is called on the submitting thread once a move
+	is settled.
+
+	A file that is locked (or otherwise fails with an OS error) is parked with
+	exponential backoff and retried later while other files keep moving; nothing sleeps
+	until :meth:`close`, which drains the parked files. After RETRY_ATTEMPTS tries a file
+	is copied and the original left in place, as before. Files that ended up not moved
+	are listed in ``stuck`` as (path, reason).
+	"""
+
+	def __init__(self, on_done: Callable[[str, Optional[MoveResult], Optional[BaseException]], None], workers: int = IO_WORKERS, checksum: bool = False) -> None:
+		self.on_done = on_done
+		self.checksum = checksum
+		self.window = max(1, workers) * 2
+		self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="organizer-move")
+		self._queue: Deque[Tuple[str, str, int, Future]] = deque()
+		# (due time, tiebreak, file path, target, attempt)
+		self._parked: List[Tuple[float, int, str, str, int]] = []
+		self._seq = count()
+		self.index = DestinationIndex()
+		self.stuck: List[Tuple[str, str]] = []
+
+	def _start(self, file_path: str, target: str, attempt: int) -> None:
+		move = _attempt_move if attempt < RETRY_ATTEMPTS - 1 else _last_attempt
+		self._queue.append((file_path, target, attempt, self._pool.submit(move, file_path, target, self.checksum)))
+
+	def _start_due(self) -> None:
+		now = time.monotonic()
+		while self._parked and self._parked[0][0] <= now:
+			_, _, file_path, target, attempt = heapq.heappop(self._parked)
+			self._start(file_path, target, attempt)
+
+	def submit(self, file_path: str, base_dir: str, category: str) -> None:
+		self._start_due()
+		self._start(file_path, self.index.target(file_path, base_dir, category), 0)
+		self._drain(block=len(self._queue) > self.window)
+
+	def _drain(self, block: bool) -> None:
+		while self._queue and (block or self._queue[0][3].done()):
+			file_path, target, attempt, future = self._queue.popleft()
+			block = len(self._queue) > self.window
+			try:
+				result, error = future.result(), None
+			except OSError as e:
+				if attempt + 1 < RETRY_ATTEMPTS:
+					delay = RETRY_DELAY * 2 ** attempt
+					print(f"[yellow]File locked, retrying in {delay:g}s while others continue (attempt {attempt + 1}/{RETRY_ATTEMPTS}):[/] {os.path.basename(file_path)}")
+					heapq.heappush(self._parked, (time.monotonic() + delay, next(self._seq), file_path, target, attempt + 1))
+					STATS.count("move.retries")
+					continue
+				result, error = None, e
+			except Exception as e:
+				result, error = None, e
+			if error is not None:
+				STATS.count("move.failed")
+				self.stuck.append((file_path, str(error)))
+			elif result.method == MOVE_COPIED_KEPT:
+				self.stuck.append((file_path, f"copied to {result.path}, original kept"))
+			self.on_done(file_path, result, error)
+
+	def close(self) -> None:
+		"""Wait for every submitted move, including parked retries, and report it."""
+		while self._queue or self._parked:
+			self._start_due()
+			if self._queue:
+				self._drain(block=True)
+			elif self._parked:
+				time.sleep(max(0.0, self._parked[0][0] - time.monotonic()))
+		self._pool.shutdown(wait=True)
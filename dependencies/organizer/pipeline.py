@@ -0,0 +1,379 @@
+"""Staged scan -> extract -> classify -> move pipeline.
+
+Each stage runs on its own and they are connected by bounded queues, so walking the
+disk, OCR/parsing and copying overlap instead of taking turns, and a slow stage holds
+the ones before it back rather than letting work pile up in memory:
+
+- scan: one thread walking the input folder (:func:`~organizer.scanner.scan_entries`)
+- extract: ``workers`` processes (or a single thread) extracting text; images are OCRed
+  in batches and unchanged files come from the text cache
+- classify: ``classify_workers`` threads predicting a category for each text
+- decide: the calling thread, in input order; this is where interactive prompts and
+  learning happen. A prediction made before the classifier learned something is
+  redone here, so a correction applies to every file after it
+- move: a :class:`~organizer.organize.MovePool` of ``io_workers`` threads
+
+With a :class:`~organizer.manifest.RunManifest` every stage records how far each file
+got, which lets an interrupted run be resumed and a finished one be undone.
+"""
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rich import print
+
+from .analyze import classify_extracted, extract_file, init_worker, is_image, ocr_batch_texts
+from .cache import TextCache
+from .classifier import Classifier
+from .manifest import CLASSIFIED, COPIED, EXTRACTED, FAILED, MOVED, SCANNED, FileRecord, RunManifest
+from .organize import IO_WORKERS, MovePool, MoveResult
+from .scanner import DEFAULT_IGNORE, scan_entries
+from .stats import STATS, collected
+
+# Items held by each queue between stages (and files looked ahead by the extractor)
+QUEUE_SIZE = 64
+
+# Marks the end of a stage's output
+_END = object()
+
+
+class _StageError:
+	def __init__(self, error: BaseException) -> None:
+		self.error = error
+
+
+class _OcrBatch:
+	"""Images OCRed by one Tesseract run; open for more images until it is launched."""
+
+	def __init__(self) -> None:
+		self.paths: List[str] = []
+		self.future: Optional[Future] = None
+		self.texts: Optional[Dict[str, str]] = None
+		# Images the batch could not read, re-submitted one by one (parallel runs only)
+		self.fallback: Dict[str, Future] = {}
+
+
+class _Job:
+	def __init__(self, path: str) -> None:
+		self.path = path
+		self.text: Optional[str] = None
+		self.future: Optional[Future] = None
+		self.batch: Optional[_OcrBatch] = None
+		# Category decided by the run being resumed
+		self.category: Optional[str] = None
+
+
+class Pipeline:
+	"""Runs a folder through the stages; see the module docstring.
+
+	- decide(path, text, predicted): called on the calling thread for every file in input
+	  order; returns the category to move the file to
+	- on_moved(path, result, error): called on the calling thread as moves finish
+	- classify_workers: threads classifying extracted text ahead of the calling thread
+	- manifest: records per-file progress; needed for resume and undo
+	"""
+
+	def __init__(self, classifier: Classifier, workers: int = 1, cache: Optional[TextCache] = None, ocr_batch: int = 32, pdf_max_pages: Optional[int] = None, io_workers: int = IO_WORKERS, checksum: bool = False, queue_size: int = QUEUE_SIZE, ignore: Iterable[str] = DEFAULT_IGNORE, max_depth: Optional[int] = None, max_size: Optional[int] = None, manifest: Optional[RunManifest] = None, classify_workers: int = 1) -> None:
+		self.classifier = classifier
+		self.workers = workers
+		self.classify_workers = max(1, classify_workers)
+		self.cache = cache
+		self.ocr_batch = ocr_batch
+		self.pdf_max_pages = pdf_max_pages
+		self.io_workers = io_workers
+		self.checksum = checksum
+		self.queue_size = max(1, queue_size)
+		self.ignore = list(ignore)
+		self.max_depth = max_depth
+		self.max_size = max_size
+		self.manifest = manifest
+		# The manifest recording the current run (none for dry runs)
+		self._manifest: Optional[RunManifest] = None
+		self._resumed: Dict[str, str] = {}
+		self._stop = threading.Event()
+		self._pool: Optional[ProcessPoolExecutor] = None
+		self._open_batch: Optional[_OcrBatch] = None
+		# Files classified by the last run
+		self.processed = 0
+
+	# Queue plumbing: blocking calls wake up regularly so a stopped run never hangs a thread
+
+	def _put(self, q: queue.Queue, item: object) -> bool:
+		while not self._stop.is_set():
+			try:
+				q.put(item, timeout=0.1)
+				return True
+			except queue.Full:
+				continue
+		return False
+
+	def _drain(self, q: queue.Queue) -> Iterator:
+		while not self._stop.is_set():
+			try:
+				item = q.get(timeout=0.1)
+			except queue.Empty:
+				continue
+			if item is _END:
+				return
+			if isinstance(item, _StageError):
+				raise item.error
+			yield item
+
+	def _stage(self, name: str, produce: Callable[[], Iterator], out: queue.Queue) -> threading.Thread:
+		def _run() -> None:
+			try:
+				for item in produce():
+					if not self._put(out, item):
+						return
+				self._put(out, _END)
+			except BaseException as e:
+				self._put(out, _StageError(e))
+
+		thread = threading.Thread(target=_run, name=f"organizer-{name}", daemon=True)
+		thread.start()
+		return thread
+
+	# Scan stage
+
+	def _scan(self, input_dir: str, base: str, previous: Dict[str, FileRecord]) -> Iterator[str]:
+		for entry in scan_entries(input_dir, [base], self.ignore, self.max_depth, self.max_size):
+			path = entry.path
+			if self._manifest:
+				st = entry.stat()
+				prev = previous.get(path)
+				if prev and prev.size == st.st_size and prev.mtime_ns == st.st_mtime_ns:
+					if prev.state == COPIED and self._settle_copied(prev):
+						continue
+					if prev.state in (CLASSIFIED, FAILED) and prev.category:
+						# Classified before the interruption: straight to the mover
+						self._resumed[path] = prev.category
+						yield path
+						continue
+				self._manifest.record(path, SCANNED, size=st.st_size, mtime_ns=st.st_mtime_ns)
+			yield path
+
+	def _settle_copied(self, prev: FileRecord) -> bool:
+		# Copied earlier but the original could not be deleted: finish the move if the copy
+		# is intact; the file is left alone either way so it is never copied twice
+		try:
+			if not (prev.target and os.path.getsize(prev.target) == prev.size):
+				return False
+			os.remove(prev.path)
+			self._manifest.record(prev.path, MOVED)
+			print(f"[green]Resumed, removed original:[/] {prev.path}")
+		except OSError:
+			pass
+		return True
+
+	# Extraction stage
+
+	def _submit(self, fn: Callable, *args: object) -> Future:
+		return self._pool.submit(collected, fn, *args)
+
+	def _result(self, future: Future) -> object:
+		# Result of a _submit()ted call; stats the worker recorded are merged into ours
+		result, stats = future.result()
+		if stats:
+			STATS.merge(*stats)
+		return result
+
+	def _plan(self, path: str) -> _Job:
+		job = _Job(path)
+		job.category = self._resumed.pop(path, None)
+		if job.category is not None:
+			return job
+		if self.cache:
+			job.text = self.cache.get(path, self._page_cap(path))
+			if job.text is not None:
+				STATS.count("extract.cache_hit")
+				return job
+		if self.ocr_batch > 1 and is_image(path):
+			# Images still needing OCR go to Tesseract in batches, paying model load once per batch
+			if self._open_batch is None:
+				self._open_batch = _OcrBatch()
+			batch = self._open_batch
+			batch.paths.append(path)
+			job.batch = batch
+			if len(batch.paths) >= self.ocr_batch:
+				self._launch(batch)
+		elif self._pool:
+			job.future = self._submit(extract_file, path, None, self.pdf_max_pages)
+		return job
+
+	def _launch(self, batch: _OcrBatch) -> None:
+		if self._open_batch is batch:
+			self._open_batch = None
+		if self._pool and batch.future is None:
+			batch.future = self._submit(ocr_batch_texts, batch.paths)
+
+	def _batch_texts(self, batch: _OcrBatch) -> Dict[str, str]:
+		# A batch is resolved when its first image comes up; images it could not read with
+		# enough confidence then take the regular per-image path
+		if batch.texts is None:
+			self._launch(batch)
+			batch.texts = self._result(batch.future) if batch.future else ocr_batch_texts(batch.paths)
+			if self._pool:
+				for p in batch.paths:
+					if p not in batch.texts:
+						batch.fallback[p] = self._submit(extract_file, p, None, self.pdf_max_pages)
+		return batch.texts
+
+	def _resolve(self, job: _Job) -> Tuple[str, str, Optional[str]]:
+		# (path, text, category decided by the resumed run or None)
+		if job.category is not None:
+			return job.path, "", job.category
+		if job.text is not None:
+			if self._manifest:
+				self._manifest.record(job.path, EXTRACTED)
+			return job.path, job.text, None
+		future = job.future
+		if job.batch is not None:
+			texts = self._batch_texts(job.batch)
+			if job.path in texts:
+				return self._finish(job.path, texts.pop(job.path), True)
+			future = job.batch.fallback.pop(job.path, None)
+		if future is not None:
+			return self._finish(job.path, *self._result(future))
+		return self._finish(job.path, *extract_file(job.path, self.classifier, self.pdf_max_pages))
+
+	def _page_cap(self, path: str) -> Optional[int]:
+		# pdf_max_pages only changes what is extracted from PDFs
+		return self.pdf_max_pages if os.path.splitext(path)[1].lower() == ".pdf" else None
+
+	def _finish(self, path: str, text: str, complete: bool) -> Tuple[str, str, Optional[str]]:
+		# Only whole documents are cached: text cut short at a keyword match would hide the
+		# rest of the document from later runs. Empty text is not cached either: OCR may
+		# simply have been unavailable this time.
+		if self.cache and complete and text.strip():
+			self.cache.put(path, text, self._page_cap(path))
+		if self._manifest:
+			self._manifest.record(path, EXTRACTED)
+		return path, text, None
+
+	def _extract(self, paths: Iterator[str]) -> Iterator[Tuple[str, str, Optional[str]]]:
+		# Results come back in input order whatever the completion order, so output and
+		# moves stay deterministic. Up to queue_size files are planned ahead, which is what
+		# keeps the worker processes and OCR batches fed.
+		if self.workers > 1:
+			self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker, initargs=(STATS.enabled,))
+		pending: Deque[_Job] = deque()
+		exhausted = False
+		try:
+			while True:
+				while not exhausted and len(pending) < max(self.queue_size, self.ocr_batch):
+					path = next(paths, None)
+					if path is None:
+						exhausted = True
+					else:
+						pending.append(self._plan(path))
+				if not pending:
+					return
+				yield self._resolve(pending.popleft())
+		finally:
+			if self._pool:
+				self._pool.shutdown(wait=not self._stop.is_set(), cancel_futures=True)
+				self._pool = None
+			self._open_batch = None
+
+	# Classification stage
+
+	def _predict(self, path: str, text: str) -> Tuple[str, int]:
+		# Generation read first: a learn() racing with classify() marks the result stale
+		generation = self.classifier.generation
+		return classify_extracted(path, text, self.classifier), generation
+
+	def _classify(self, items: Iterator[Tuple[str, str, Optional[str]]]) -> Iterator[Tuple[str, str, str, Optional[int]]]:
+		# (path, text, category, classifier generation predicted with; None if resumed).
+		# With several threads, results still come out in input order.
+		if self.classify_workers == 1:
+			for path, text, category in items:
+				if category is not None:
+					yield path, text, category, None
+				else:
+					yield (path, text, *self._predict(path, text))
+			return
+		pool = ThreadPoolExecutor(max_workers=self.classify_workers, thread_name_prefix="organizer-classify")
+		pending: Deque[Tuple[str, str, Optional[str], Optional[Future]]] = deque()
+		try:
+			for path, text, category in items:
+				future = pool.submit(self._predict, path, text) if category is None else None
+				pending.append((path, text, category, future))
+				while pending and (len(pending) > self.classify_workers * 2 or pending[0][3] is None or pending[0][3].done()):
+					yield self._classified(pending.popleft())
+			while pending:
+				yield self._classified(pending.popleft())
+		finally:
+			pool.shutdown(wait=not self._stop.is_set(), cancel_futures=True)
+
+	def _classified(self, item: Tuple[str, str, Optional[str], Optional[Future]]) -> Tuple[str, str, str, Optional[int]]:
+		path, text, category, future = item
+		if future is None:
+			return path, text, category, None
+		return (path, text, *future.result())
+
+	def run(self, input_dir: str, base: str, decide: Callable[[str, str, str], str], on_moved: Callable[[str, Optional[MoveResult], Optional[BaseException]], None], dry_run: bool = False, resume: bool = False) -> List[Tuple[str, str]]:
+		"""Process every file under input_dir; returns files that could not be moved, with reasons.
+
+		With ``resume`` (and a manifest), the last unfinished run over the same folders is
+		continued: files it already classified go straight to the mover and copies whose
+		original could not be deleted are settled; everything else is processed again
+		(cheaply, if the text cache is on).
+		"""
+		manifest = self._manifest = None if dry_run else self.manifest
+		previous: Dict[str, FileRecord] = {}
+		if manifest and manifest.start(input_dir, base, resume):
+			previous = manifest.records()
+			print(f"[cyan]Resuming run {manifest.run_id} ({len(previous)} files recorded)[/]")
+		self._resumed = {}
+		self.processed = 0
+
+		def _moved(path: str, moved: Optional[MoveResult], error: Optional[BaseException]) -> None:
+			if manifest:
+				manifest.record_move(path, moved, error)
+			on_moved(path, moved, error)
+
+		scanned: queue.Queue = queue.Queue(maxsize=self.queue_size)
+		extracted: queue.Queue = queue.Queue(maxsize=self.queue_size)
+		classified: queue.Queue = queue.Queue(maxsize=self.queue_size)
+		self._stop.clear()
+		threads = [
+			self._stage("scan", lambda: self._scan(input_dir, base, previous), scanned),
+			self._stage("extract", lambda: self._extract(self._drain(scanned)), extracted),
+			self._stage("classify", lambda: self._classify(self._drain(extracted)), classified),
+		]
+		mover = None if dry_run else MovePool(_moved, self.io_workers, self.checksum)
+		completed = False
+		try:
+			for path, text, pred, generation in self._drain(classified):
+				self.processed += 1
+				if generation is None:
+					chosen = pred
+					print(f"[cyan]Resumed:[/] {path} [green]-> {chosen}[/]")
+				else:
+					if generation != self.classifier.generation:
+						# Predicted before the classifier learned something (e.g. an interactive correction)
+						pred = classify_extracted(path, text, self.classifier)
+					chosen = decide(path, text, pred)
+					if manifest:
+						manifest.record(path, CLASSIFIED, category=chosen)
+				if mover:
+					try:
+						mover.submit(path, base, chosen)
+					except Exception as e:
+						mover.stuck.append((path, str(e)))
+						_moved(path, None, e)
+			for thread in threads:
+				thread.join()
+			completed = True
+		finally:
+			# On an error or abort, stop the producers; moves already handed out still finish
+			self._stop.set()
+			if mover:
+				mover.close()
+			if manifest:
+				# Runs left unfinished (or with files not moved) can be resumed
+				manifest.finish("done" if completed and not mover.stuck else "incomplete")
+		return mover.stuck if mover else []
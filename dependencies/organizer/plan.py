@@ -0,0 +1,138 @@
+"""Plans: the outcome of a dry run, saved so it can be reviewed, edited and applied later.
+
+A plan is a JSON Lines file. The first line describes the run, every further line one
+file::
+
+	{"plan": 1, "input_dir": "...", "base": "..."}
+	{"path": "...", "size": 1234, "mtime_ns": ..., "category": "Rechnungen", "predicted": "Rechnungen", "text_sha256": "..."}
+
+``category`` is where the file will go and may be edited freely; ``predicted`` is what
+the classifier said. Applying a plan moves the files without extracting anything again;
+files whose size or mtime changed since the dry run are skipped.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, IO, Iterator, List, NamedTuple, Optional, Tuple
+
+from .manifest import RunManifest
+from .organize import IO_WORKERS, MovePool, MoveResult
+
+PLAN_VERSION = 1
+
+
+class PlanEntry(NamedTuple):
+	path: str
+	size: int
+	mtime_ns: int
+	category: str
+	predicted: str
+	text_sha256: str
+
+
+def text_digest(text: str) -> str:
+	return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class PlanWriter:
+	"""Writes a plan line by line as files are classified; safe to call from several threads."""
+
+	def __init__(self, path: str, input_dir: str, base: str) -> None:
+		self.path = path
+		self._lock = threading.Lock()
+		folder = os.path.dirname(os.path.abspath(path))
+		os.makedirs(folder, exist_ok=True)
+		self._file: IO[str] = open(path, "w", encoding="utf-8")
+		self._write({"plan": PLAN_VERSION, "input_dir": os.path.abspath(input_dir), "base": os.path.abspath(base)})
+
+	def _write(self, obj: dict) -> None:
+		with self._lock:
+			self._file.write(json.dumps(obj, ensure_ascii=False) + "\n")
+
+	def add(self, path: str, text: str, predicted: str, category: str) -> None:
+		st = os.stat(path)
+		entry = PlanEntry(os.path.abspath(path), st.st_size, st.st_mtime_ns, category, predicted, text_digest(text))
+		self._write(entry._asdict())
+
+	def close(self) -> None:
+		with self._lock:
+			self._file.close()
+
+
+def read_plan(path: str) -> Tuple[dict, Iterator[PlanEntry]]:
+	"""Header and entries of a plan; raises ValueError for a file that is not a plan."""
+	f = open(path, "r", encoding="utf-8")
+	try:
+		header = json.loads(f.readline() or "{}")
+	except json.JSONDecodeError:
+		header = {}
+	if not isinstance(header, dict) or header.get("plan") != PLAN_VERSION:
+		f.close()
+		raise ValueError(f"{path} is not a plan written by process --plan-out")
+
+	def _entries() -> Iterator[PlanEntry]:
+		with f:
+			for number, line in enumerate(f, start=2):
+				if not line.strip():
+					continue
+				try:
+					data = json.loads(line)
+					yield PlanEntry(
+						data["path"], int(data["size"]), int(data["mtime_ns"]), str(data["category"]),
+						data.get("predicted", data["category"]), data.get("text_sha256", ""),
+					)
+				except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+					raise ValueError(f"{path}:{number}: invalid plan entry ({e})") from e
+
+	return header, _entries()
+
+
+def _unchanged(entry: PlanEntry) -> Optional[str]:
+	# Reason the file may not be moved, or None if it is as it was when planned
+	try:
+		st = os.stat(entry.path)
+	except OSError as e:
+		return str(e)
+	if st.st_size != entry.size or st.st_mtime_ns != entry.mtime_ns:
+		return "changed since the plan was made"
+	return None
+
+
+def apply_plan(path: str, on_moved: Callable[[str, Optional[MoveResult], Optional[BaseException]], None], base: Optional[str] = None, io_workers: int = IO_WORKERS, checksum: bool = False, manifest: Optional[RunManifest] = None) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+	"""Move the files of a plan to their categories; returns (skipped, stuck) with reasons.
+
+	- base: output folder (default: the one the plan was made for)
+	- manifest: records the moves as a run, so they can be undone like any other
+	"""
+	header, entries = read_plan(path)
+	base = base or header["base"]
+	os.makedirs(base, exist_ok=True)
+	if manifest:
+		manifest.start(header.get("input_dir", base), base)
+
+	def _moved(file_path: str, moved: Optional[MoveResult], error: Optional[BaseException]) -> None:
+		if manifest:
+			manifest.record_move(file_path, moved, error)
+		on_moved(file_path, moved, error)
+
+	skipped: List[Tuple[str, str]] = []
+	mover = MovePool(_moved, io_workers, checksum)
+	completed = False
+	try:
+		for entry in entries:
+			reason = _unchanged(entry)
+			if reason:
+				skipped.append((entry.path, reason))
+				continue
+			try:
+				mover.submit(entry.path, base, entry.category)
+			except Exception as e:
+				mover.stuck.append((entry.path, str(e)))
+				_moved(entry.path, None, e)
+		completed = True
+	finally:
+		mover.close()
+		if manifest:
+			manifest.finish("done" if completed and not mover.stuck else "incomplete")
+	return skipped, mover.stuck
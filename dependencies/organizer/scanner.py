@@ -0,0 +1,90 @@
+import fnmatch
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Pattern, Sequence, Set, Tuple
+
+# Names never worth organizing: Office/LibreOffice lock files, temp and partial files,
+# OS thumbnail/metadata files
+DEFAULT_IGNORE: Tuple[str, ...] = (
+	"~$*",
+	".~lock.*#",
+	"*.tmp",
+	"*.part",
+	"*.crdownload",
+	"Thumbs.db",
+	"desktop.ini",
+	".DS_Store",
+)
+
+
+def _split_globs(patterns: Iterable[str]) -> Tuple[Set[str], Tuple[str, ...], Tuple[str, ...], Optional[Pattern[str]]]:
+	# Exact names, "*suffix" and "prefix*" globs become a set lookup or a str method
+	# call; anything else goes into one combined regex
+	exact: Set[str] = set()
+	suffixes: List[str] = []
+	prefixes: List[str] = []
+	other: List[str] = []
+	for pattern in map(os.path.normcase, patterns):
+		body = pattern.strip("*")
+		if any(c in body for c in "*?["):
+			other.append(fnmatch.translate(pattern))
+		elif pattern == body:
+			exact.add(pattern)
+		elif pattern == "*" + body:
+			suffixes.append(body)
+		elif pattern == body + "*":
+			prefixes.append(body)
+		else:
+			other.append(fnmatch.translate(pattern))
+	return exact, tuple(suffixes), tuple(prefixes), re.compile("|".join(other)) if other else None
+
+
+def _key(path: str) -> str:
+	return os.path.normcase(os.path.abspath(path))
+
+
+def scan_entries(root: str, exclude: Sequence[str] = (), ignore: Iterable[str] = DEFAULT_IGNORE, max_depth: Optional[int] = None, max_size: Optional[int] = None) -> Iterator[os.DirEntry]:
+	"""Yield the files under root as DirEntry objects, top-down, like os.walk but with
+	filters applied early.
+
+	- exclude: directories never descended into (the organized output); compared as whole
+	  paths, so a sibling such as ``organized2`` is still scanned
+	- ignore: glob patterns for file and directory names to skip (DEFAULT_IGNORE)
+	- max_depth: 0 scans only root itself, 1 also its subfolders, and so on (None = all)
+	- max_size: skip files larger than this many bytes
+
+	Built on os.scandir: file/dir checks use the entry's cached type and only the size
+	filter needs a stat (which Windows returns with the listing anyway). Symlinked
+	folders are not followed and unreadable folders are skipped, as with os.walk.
+	"""
+	excluded = {_key(path) for path in exclude}
+	exact, suffixes, prefixes, regex = _split_globs(ignore)
+	# Names are compared normcase'd, so ignore globs are case-insensitive on Windows
+	fold = os.name == "nt"
+	stack: List[Tuple[str, int]] = [(root, 0)]
+	while stack:
+		folder, depth = stack.pop()
+		subdirs: List[str] = []
+		try:
+			with os.scandir(folder) as entries:
+				for entry in entries:
+					name = os.path.normcase(entry.name) if fold else entry.name
+					if name in exact or name.endswith(suffixes) or name.startswith(prefixes) or (regex is not None and regex.match(name)):
+						continue
+					try:
+						if entry.is_dir(follow_symlinks=False):
+							if (max_depth is None or depth < max_depth) and _key(entry.path) not in excluded:
+								subdirs.append(entry.path)
+							continue
+						if not entry.is_file():
+							continue
+						if max_size is not None and entry.stat().st_size > max_size:
+							continue
+					except OSError:
+						continue
+					yield entry
+		except OSError:
+			continue
+		# Reversed so the stack visits subfolders in listing order
+		stack.extend((path, depth + 1) for path in reversed(subdirs))
+
@@ -0,0 +1,162 @@
+"""Run statistics: latency samples and counters per pipeline stage.
+
+Stages record into the process-wide :data:`STATS`, which does nothing until enabled, so
+the instrumentation costs a flag check on normal runs. Stage names are dotted:
+
+- ``extract.<ext>``: time spent inside an extractor, per file (cache hits are counted)
+- ``ocr.<lang>.<config>``: one Tesseract pass of the per-image strategy; ``ocr.batch``
+  is one batched Tesseract run
+- ``classify.keyword`` / ``classify.fuzzy`` / ``classify.learned``: the classifier stages,
+  with ``classify.by.<stage>`` counting which one decided
+- ``move.renamed`` / ``move.copied`` / ...: a move attempt by how it ended, plus
+  ``move.retries`` and ``move.failed``
+
+Pool workers collect into their own :data:`STATS`; :func:`collected` ships their samples
+back with each result and the parent merges them.
+"""
+import json
+import math
+import threading
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from rich import print
+from rich.table import Table
+
+Samples = Dict[str, List[float]]
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+	# Nearest-rank percentile of an already sorted list
+	return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class RunStats:
+	"""Thread-safe latency samples (seconds) and counters, keyed by stage name."""
+
+	def __init__(self) -> None:
+		self.enabled = False
+		self._lock = threading.Lock()
+		# Doubles in an array take 8 bytes per sample, against ~32 for a list of floats
+		self._samples: Dict[str, array] = {}
+		self._counters: Counter = Counter()
+
+	def add(self, name: str, seconds: float) -> None:
+		if not self.enabled:
+			return
+		with self._lock:
+			samples = self._samples.get(name)
+			if samples is None:
+				samples = self._samples[name] = array("d")
+			samples.append(seconds)
+
+	def count(self, name: str, n: int = 1) -> None:
+		if not self.enabled:
+			return
+		with self._lock:
+			self._counters[name] += n
+
+	@contextmanager
+	def timer(self, name: str) -> Iterator[None]:
+		if not self.enabled:
+			yield
+			return
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.add(name, time.perf_counter() - start)
+
+	def timed_chunks(self, name: str, chunks: Iterator[str]) -> Iterator[str]:
+		"""Pass ``chunks`` through, recording the time spent producing them as one sample.
+
+		Only time inside the wrapped generator counts, not what the consumer does between
+		chunks; stopping early (closing) still records the sample.
+		"""
+		if not self.enabled:
+			yield from chunks
+			return
+		elapsed = 0.0
+		try:
+			while True:
+				start = time.perf_counter()
+				try:
+					chunk = next(chunks)
+				except StopIteration:
+					return
+				finally:
+					elapsed += time.perf_counter() - start
+				yield chunk
+		finally:
+			chunks.close()
+			self.add(name, elapsed)
+
+	def take(self) -> Tuple[Samples, Dict[str, int]]:
+		"""Everything recorded so far, clearing it."""
+		with self._lock:
+			samples = {name: values.tolist() for name, values in self._samples.items()}
+			counters = dict(self._counters)
+			self._samples.clear()
+			self._counters.clear()
+		return samples, counters
+
+	def merge(self, samples: Samples, counters: Dict[str, int]) -> None:
+		with self._lock:
+			for name, values in samples.items():
+				self._samples.setdefault(name, array("d")).extend(values)
+			self._counters.update(counters)
+
+	def report(self, elapsed: float, files: int) -> Dict[str, Any]:
+		"""Summary for a run that handled ``files`` files in ``elapsed`` wall-clock seconds."""
+		with self._lock:
+			stages = {}
+			for name in sorted(self._samples):
+				ordered = sorted(self._samples[name])
+				if not ordered:
+					continue
+				stages[name] = {
+					"count": len(ordered),
+					"total": sum(ordered),
+					"p50": _percentile(ordered, 0.50),
+					"p95": _percentile(ordered, 0.95),
+					"max": ordered[-1],
+				}
+			counters = dict(sorted(self._counters.items()))
+		return {
+			"files": files,
+			"elapsed": elapsed,
+			"files_per_sec": files / elapsed if elapsed > 0 else 0.0,
+			"stages": stages,
+			"counters": counters,
+		}
+
+
+# Process-wide collector; enabled by the CLI (and, through init_worker, in pool workers)
+STATS = RunStats()
+
+
+def collected(fn: Callable[..., Any], *args: Any) -> Tuple[Any, Optional[Tuple[Samples, Dict[str, int]]]]:
+	"""Run ``fn`` in a pool worker and return its result with the stats it recorded."""
+	result = fn(*args)
+	return result, STATS.take() if STATS.enabled else None
+
+
+def print_report(report: Dict[str, Any]) -> None:
+	table = Table(title=f"{report['files']} files in {report['elapsed']:.1f}s ({report['files_per_sec']:.1f} files/s)")
+	table.add_column("Stage")
+	for column in ("Count", "Total s", "p50 ms", "p95 ms", "Max ms"):
+		table.add_column(column, justify="right")
+	for name, s in report["stages"].items():
+		table.add_row(name, str(s["count"]), f"{s['total']:.2f}", f"{s['p50'] * 1000:.1f}", f"{s['p95'] * 1000:.1f}", f"{s['max'] * 1000:.1f}")
+	print(table)
+	if report["counters"]:
+		print("  ".join(f"[cyan]{name}[/] {value}" for name, value in report["counters"].items()))
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+	with open(path, "w", encoding="utf-8") as f:
+		json.dump(report, f, indent=2)
+		f.write("\n")
@@ -0,0 +1,91 @@
+import os
+import random
+import sys
+import time
+from typing import List, Optional, Tuple
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE)
+
+from rapidfuzz import fuzz
+
+from organizer.classifier import ExemplarIndex, _normalize
+
+# Exemplars are what Classifier.learn stores: the first 500 normalized characters
+EXEMPLAR_CHARS = 500
+THRESHOLD = 70
+SYLLABLES = [
+	"an", "be", "ch", "de", "ein", "er", "ge", "hal", "in", "ke", "lich", "mer", "nach",
+	"or", "pre", "rung", "sch", "ten", "ung", "ver", "wal", "zu", "st", "ab", "ei", "au",
+]
+
+
+def make_vocabulary(rng: random.Random, size: int = 20000) -> List[str]:
+	return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))) for _ in range(size)]
+
+
+def make_text(rng: random.Random, vocabulary: List[str], words: int) -> str:
+	# Zipf-like word frequencies, as in real documents
+	weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+	return " ".join(rng.choices(vocabulary, weights, k=words))
+
+
+def mutate(rng: random.Random, text: str, rate: float) -> str:
+	# OCR-style noise: substituted characters
+	return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") if rng.random() < rate else c for c in text)
+
+
+def brute_force(exemplars: List[str], categories: List[str], text_norm: str) -> Optional[str]:
+	# Reference: every exemplar scored, first one in store order wins ties
+	best_category, best_score = None, 0.0
+	for exemplar, category in zip(exemplars, categories):
+		score = fuzz.partial_ratio(exemplar, text_norm)
+		if score > best_score:
+			best_score, best_category = score, category
+	return best_category if best_score >= THRESHOLD else None
+
+
+def run(index: ExemplarIndex, exemplars: List[str], categories: List[str], rng: random.Random, vocabulary: List[str], words: int, noise: float, trials: int, check: bool) -> Tuple[int, int, float]:
+	misses = mismatches = 0
+	elapsed = 0.0
+	for _ in range(trials):
+		idx = rng.randrange(len(exemplars))
+		text = make_text(rng, vocabulary, words)
+		cut = rng.randint(0, len(text))
+		embedded = mutate(rng, exemplars[idx], noise)
+		text_norm = _normalize(text[:cut] + " " + embedded + " " + text[cut:])
+		start = time.perf_counter()
+		found = index.best_match(text_norm, THRESHOLD)
+		elapsed += time.perf_counter() - start
+		if found != categories[idx]:
+			misses += 1
+		if check and found != brute_force(exemplars, categories, text_norm):
+			mismatches += 1
+	return misses, mismatches, elapsed / trials
+
+
+def main() -> None:
+	# Usage: python scripts/bench_exemplars.py [exemplar count ...]
+	# Recall: a learned exemplar embedded in a document (verbatim, then with 10% and 20% noise)
+	# must be found. Agreement: the result must equal brute-force partial_ratio, checked
+	# where brute force is affordable.
+	rng = random.Random(42)
+	vocabulary = make_vocabulary(rng)
+	for count in [int(arg) for arg in sys.argv[1:]] or [5000, 20000]:
+		exemplars = [_normalize(make_text(rng, vocabulary, 120))[:EXEMPLAR_CHARS] for _ in range(count)]
+		categories = [f"cat{i}" for i in range(count)]
+		start = time.perf_counter()
+		index = ExemplarIndex(dict(zip(exemplars, categories)))
+		# The first lookup also packs the postings and weighs the exemplars
+		index.best_match(exemplars[0])
+		print(f"{count} exemplars indexed in {time.perf_counter() - start:.1f}s")
+		for words, trials in ((60, 100), (200, 100), (2000, 100), (10000, 20)):
+			for noise in (0.0, 0.1, 0.2):
+				check = count * words <= 5000 * 2000
+				misses, mismatches, latency = run(index, exemplars, categories, rng, vocabulary, words, noise, min(trials, 10) if check else trials, check)
+				agreement = f", {mismatches} differ from brute force" if check else ""
+				print(f"  {words:>6} words, noise {noise:.0%}: {misses} missed{agreement}, {latency * 1000:.2f} ms/lookup")
+
+
+if __name__ == "__main__":
+	main()
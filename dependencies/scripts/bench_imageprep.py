@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+from typing import Dict, List
+
+from PIL import Image
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE)
+
+from organizer.imageprep import open_image, prepare_image
+
+DEFAULT_DIRS = [os.path.join(BASE, "UnsortedDemo"), os.path.join(BASE, "Unsorted")]
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".tif", ".tiff")
+
+
+def find_images(paths: List[str]) -> List[str]:
+	found = []
+	for path in paths:
+		if os.path.isfile(path):
+			found.append(path)
+			continue
+		for root, _, files in os.walk(path):
+			for name in files:
+				if name.lower().endswith(IMAGE_SUFFIXES):
+					found.append(os.path.join(root, name))
+	return found
+
+
+def legacy_prepare(path: str, timings: Dict[str, float]) -> Image.Image:
+	# The preparation used before imageprep: full-size RGB, small images doubled
+	start = time.perf_counter()
+	img = Image.open(path)
+	img.load()
+	timings["open"] = timings.get("open", 0.0) + time.perf_counter() - start
+	start = time.perf_counter()
+	if img.mode != "RGB":
+		img = img.convert("RGB")
+	if img.width < 300 or img.height < 100:
+		img = img.resize((img.width * 2, img.height * 2), Image.Resampling.LANCZOS)
+	timings["convert+resize"] = timings.get("convert+resize", 0.0) + time.perf_counter() - start
+	return img
+
+
+def ocr_seconds(img: Image.Image) -> float:
+	import pytesseract
+	start = time.perf_counter()
+	pytesseract.image_to_data(img, lang="deu+eng", config="--psm 6")
+	return time.perf_counter() - start
+
+
+def main() -> None:
+	# Usage: python scripts/bench_imageprep.py [--ocr] [file-or-dir ...]
+	args = sys.argv[1:]
+	with_ocr = "--ocr" in args
+	images = find_images([a for a in args if a != "--ocr"] or DEFAULT_DIRS)
+	if not images:
+		print("No images found")
+		return
+	old: Dict[str, float] = {}
+	new: Dict[str, float] = {}
+	old_pixels = new_pixels = 0
+	for path in images:
+		before = legacy_prepare(path, old)
+		with open_image(path, new) as img:
+			after = prepare_image(img, timings=new)
+		old_pixels += before.width * before.height
+		new_pixels += after.width * after.height
+		line = f"{os.path.basename(path)}: {before.width}x{before.height} {before.mode} -> {after.width}x{after.height} {after.mode}"
+		if with_ocr:
+			t_old, t_new = ocr_seconds(before), ocr_seconds(after)
+			old["ocr"] = old.get("ocr", 0.0) + t_old
+			new["ocr"] = new.get("ocr", 0.0) + t_new
+			line += f", OCR {t_old:.2f}s -> {t_new:.2f}s"
+		print(line)
+	for label, timings in (("legacy", old), ("imageprep", new)):
+		stages = ", ".join(f"{name} {secs * 1000:.0f} ms" for name, secs in timings.items())
+		print(f"{label}: {stages}; total {sum(timings.values()) * 1000:.0f} ms")
+	print(f"Pixels sent to Tesseract: {old_pixels:,} -> {new_pixels:,}")
+
+
+if __name__ == "__main__":
+	main()
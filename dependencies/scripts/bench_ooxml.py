@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+from typing import Callable, Iterator, List
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE)
+
+from organizer.extractors import _docx_paragraphs_via_python_docx, _pptx_shape_texts_via_python_pptx
+from organizer.ooxml import iter_docx_paragraphs, iter_pptx_shape_texts
+
+DEFAULT_DIRS = [os.path.join(BASE, "Unsorted"), os.path.join(BASE, "UnsortedDemo")]
+ROUNDS = 3
+
+
+def find_files(paths: List[str]) -> List[str]:
+	found = []
+	for path in paths:
+		if os.path.isfile(path):
+			found.append(path)
+			continue
+		for root, _, files in os.walk(path):
+			for name in files:
+				if name.lower().endswith((".docx", ".pptx")):
+					found.append(os.path.join(root, name))
+	return found
+
+
+def best_time(fn: Callable[[str], Iterator[str]], path: str) -> float:
+	best = float("inf")
+	for _ in range(ROUNDS):
+		start = time.perf_counter()
+		"\n".join(fn(path))
+		best = min(best, time.perf_counter() - start)
+	return best
+
+
+def main() -> None:
+	# Usage: python scripts/bench_ooxml.py [file-or-dir ...]
+	files = find_files(sys.argv[1:] or DEFAULT_DIRS)
+	if not files:
+		print("No .docx/.pptx files found")
+		return
+	total_native = total_lib = 0.0
+	for path in files:
+		if path.lower().endswith(".docx"):
+			native, lib = iter_docx_paragraphs, _docx_paragraphs_via_python_docx
+		else:
+			native, lib = iter_pptx_shape_texts, _pptx_shape_texts_via_python_pptx
+		t_native = best_time(native, path)
+		t_lib = best_time(lib, path)
+		same = "\n".join(native(path)) == "\n".join(lib(path))
+		total_native += t_native
+		total_lib += t_lib
+		print(f"{os.path.basename(path)}: native {t_native * 1000:.1f} ms, library {t_lib * 1000:.1f} ms, speedup {t_lib / t_native:.1f}x{'' if same else ' (TEXT DIFFERS)'}")
+	print(f"Total: native {total_native * 1000:.1f} ms, library {total_lib * 1000:.1f} ms, speedup {total_lib / total_native:.1f}x")
+
+
+if __name__ == "__main__":
+	main()